@@ -0,0 +1 @@
+"""Benchmarks for the 2048 engines. Run them from the repository root with ``python -m``."""
@@ -0,0 +1,105 @@
+"""Timing, allocation and baseline helpers shared by the benchmarks."""
+
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """Time ``fn`` and return ns/op, ops/s and peak bytes allocated per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    fn()  # warm caches before tracing
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "ns_per_op": best * 1e9,
+        "ops_per_sec": 1.0 / best if best else float("inf"),
+        "peak_alloc_bytes": max(0, peak - before),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def print_results(results):
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'ns/op':>12}  {'ops/s':>12}  {'peak bytes':>10}")
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['ns_per_op']:>12.0f}  {r['ops_per_sec']:>12.0f}  {r['peak_alloc_bytes']:>10}")
+
+
+def save_baseline(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"environment": environment(), "results": results}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare_baseline(path, results, threshold):
+    """Print the ns/op change against a saved baseline.
+
+    Returns the names of benchmarks that got slower by more than
+    ``threshold`` (a fraction, e.g. 0.2 for 20%).
+    """
+    baseline = json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+    regressions = []
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}")
+    for name, r in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<{width}}  {'-':>12}  {r['ns_per_op']:>12.0f}  {'new':>8}")
+            continue
+        change = r["ns_per_op"] / old["ns_per_op"] - 1.0
+        flag = "  <-- regression" if change > threshold else ""
+        print(f"{name:<{width}}  {old['ns_per_op']:>12.0f}  {r['ns_per_op']:>12.0f}  {change:>+8.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def run_cli(description, collect, default_baseline, argv=None):
+    """Shared command line for the benchmark modules."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--filter", "-k", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", nargs="?", const=str(default_baseline), help="write results as a JSON baseline")
+    parser.add_argument("--compare", nargs="?", const=str(default_baseline), help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown fraction counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in collect():
+        if args.filter in name:
+            results[name] = measure(fn, repeat=args.repeat)
+    print_results(results)
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nbaseline written to {args.save}")
+    if args.compare:
+        print()
+        if compare_baseline(args.compare, results, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,40 @@
+"""Reproducible boards for the benchmarks."""
+
+import numpy as np
+
+FIXTURES = {
+    "empty": [
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+    ],
+    # One empty cell and no merges left or up.
+    "near_full": [
+        [2, 4, 8, 16],
+        [32, 64, 128, 256],
+        [512, 1024, 2048, 4],
+        [8, 16, 32, 0],
+    ],
+    # Every row and column has merges available.
+    "many_merges": [
+        [2, 2, 4, 4],
+        [2, 2, 4, 4],
+        [8, 8, 16, 16],
+        [8, 8, 16, 16],
+    ],
+    "midgame": [
+        [2, 0, 4, 2],
+        [4, 16, 8, 0],
+        [8, 32, 64, 4],
+        [128, 256, 16, 2],
+    ],
+}
+
+
+def fixture(name, dtype=int):
+    return np.array(FIXTURES[name], dtype=dtype)
+
+
+def batch_fixture(name, count=1024):
+    return np.repeat(fixture(name)[None, :, :], count, axis=0)
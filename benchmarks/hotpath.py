@@ -0,0 +1,68 @@
+"""Benchmark the move/merge/spawn hot path of every engine.
+
+    python -m benchmarks.hotpath                 # print ns/op, ops/s, peak bytes
+    python -m benchmarks.hotpath --save          # write benchmarks/baselines/hotpath.json
+    python -m benchmarks.hotpath --compare       # diff against the saved baseline
+
+Batch benchmarks run on 1024 boards per call, so their ops/s is calls per
+second; multiply by 1024 for boards per second.
+"""
+
+import random
+from pathlib import Path
+
+import numpy as np
+
+from game2048 import UP, batch, bitboard, core, render, symmetry
+from game2048.heuristic import default_heuristic
+
+from .common import run_cli
+from .fixtures import FIXTURES, batch_fixture, fixture
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "hotpath.json"
+BATCH_SIZE = 1024
+
+
+def collect():
+    rng = random.Random(0)
+    gen = np.random.default_rng(0)
+
+    heuristic = default_heuristic()
+
+    for name in FIXTURES:
+        board = fixture(name)
+        packed = bitboard.pack(board)
+        boards = batch_fixture(name, BATCH_SIZE)
+
+        yield f"numpy.move_left[{name}]", lambda b=board: core.move_left(b)
+        yield f"numpy.move_up[{name}]", lambda b=board: core.move_up(b)
+        yield f"numpy.move_inplace_up[{name}]", lambda b=board: core.move_inplace(b.copy(), UP)
+        yield f"numpy.can_move[{name}]", lambda b=board: core.can_move(b)
+        yield f"numpy.legal_mask[{name}]", lambda b=board: core.legal_mask(b)
+        yield f"numpy.canonical_array[{name}]", lambda b=board: symmetry.canonical_array(b)
+        yield f"numpy.add_random_tile[{name}]", lambda b=board: core.add_random_tile(b.copy())
+
+        yield f"bitboard.move_left[{name}]", lambda p=packed: bitboard.move_left(p)
+        yield f"bitboard.move_up[{name}]", lambda p=packed: bitboard.move_up(p)
+        yield f"bitboard.can_move[{name}]", lambda p=packed: bitboard.can_move(p)
+        yield f"bitboard.legal_mask[{name}]", lambda p=packed: bitboard.legal_mask(p)
+        yield f"bitboard.add_random_tile[{name}]", lambda p=packed: bitboard.add_random_tile(p, rng)
+        yield f"bitboard.canonical_key[{name}]", lambda p=packed: symmetry.canonical_key(p)
+        yield f"bitboard.heuristic[{name}]", lambda p=packed: heuristic.evaluate(p)
+
+        yield f"batch.move_left[{name}]", lambda bs=boards: batch.move_left(bs)
+        yield f"batch.move_up[{name}]", lambda bs=boards: batch.move_up(bs)
+        yield f"batch.can_move[{name}]", lambda bs=boards: batch.can_move(bs)
+        yield f"batch.legal_mask[{name}]", lambda bs=boards: batch.legal_mask(bs)
+        yield f"batch.add_random_tile[{name}]", lambda bs=boards: batch.add_random_tile(bs.copy(), gen)
+        yield f"batch.heuristic[{name}]", lambda bs=boards: heuristic.evaluate_array(bs)
+
+        yield f"numpy.render_board_html[{name}]", lambda b=board: render.render_board_html(b, 0)
+
+
+def main(argv=None):
+    run_cli(__doc__.splitlines()[0], collect, BASELINE, argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark how long the engine modules take to import in a fresh interpreter.
+
+    python -m benchmarks.imports                 # print ms per import and peak bytes
+    python -m benchmarks.imports --save          # write benchmarks/baselines/imports.json
+    python -m benchmarks.imports --compare       # diff against the saved baseline
+
+Every sample runs in a new ``python`` process, so nothing is cached in
+``sys.modules``; the best of ``--repeat`` runs is reported.  A module that
+pulls in Streamlit (or any other UI module) fails the run outright, since
+the simulator, benchmarks and workers rely on importing the engine alone.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from .common import compare_baseline, print_results, save_baseline
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "imports.json"
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = (
+    "game2048",
+    "game2048.core",
+    "game2048.render",
+    "game2048.bitboard",
+    "game2048.expectimax",
+    "game2048.rollout",
+    "game2048.autoplay",
+    "game2048.ntuple",
+    "game2048.simulate",
+    "game2048.tui",
+)
+UI_MODULES = ("streamlit", "board_component")
+
+_PROBE = """
+import json, sys, time, tracemalloc
+if sys.argv[2] == "trace":
+    tracemalloc.start()
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+print(json.dumps({"seconds": elapsed, "peak": peak, "modules": sorted(sys.modules)}))
+"""
+
+
+def probe(module, trace=False):
+    """Import ``module`` in a fresh interpreter and return its timing report."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, module, "trace" if trace else "time"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def measure_import(module, repeat=5):
+    """Best-of-``repeat`` import time plus the peak bytes allocated while importing."""
+    runs = [probe(module) for _ in range(repeat)]
+    leaked = sorted({m.split(".")[0] for m in runs[0]["modules"]} & set(UI_MODULES))
+    if leaked:
+        raise SystemExit(f"importing {module} also imports {', '.join(leaked)}")
+    best = min(run["seconds"] for run in runs)
+    return {
+        "ns_per_op": best * 1e9,
+        "ops_per_sec": 1.0 / best if best else float("inf"),
+        "peak_alloc_bytes": probe(module, trace=True)["peak"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", "-k", default="", help="only import modules whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", nargs="?", const=str(BASELINE), help="write results as a JSON baseline")
+    parser.add_argument("--compare", nargs="?", const=str(BASELINE), help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown fraction counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        f"import[{module}]": measure_import(module, args.repeat)
+        for module in MODULES
+        if args.filter in module
+    }
+    print_results(results)
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"\nbaseline written to {args.save}")
+    if args.compare:
+        print()
+        if compare_baseline(args.compare, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
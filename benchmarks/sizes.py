@@ -0,0 +1,50 @@
+"""Benchmark how move cost grows with the board size.
+
+    python -m benchmarks.sizes                   # print ns/op, ops/s, peak bytes
+    python -m benchmarks.sizes --save            # write benchmarks/baselines/sizes.json
+    python -m benchmarks.sizes --compare         # diff against the saved baseline
+
+Each size uses a half-filled board drawn from a fixed seed.  The batch
+engine only pays off when many boards move together; for one board the
+in-place walk stays ahead at every supported size.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from game2048 import LEFT, UP, batch, core
+
+from .common import run_cli
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "sizes.json"
+BATCH_SIZE = 1024
+
+
+def sized_board(size, seed=0):
+    """A reproducible ``size`` x ``size`` board with about half the cells filled."""
+    rng = np.random.default_rng(seed)
+    board = 2 ** rng.integers(1, 8, size=(size, size))
+    board[rng.random((size, size)) < 0.5] = 0
+    return board
+
+
+def collect():
+
+    for size in core.BOARD_SIZES:
+        board = sized_board(size)
+        boards = np.repeat(board[None, :, :], BATCH_SIZE, axis=0)
+
+        yield f"numpy.move_left[{size}x{size}]", lambda b=board: core.move_left(b)
+        yield f"numpy.move_inplace_up[{size}x{size}]", lambda b=board: core.move_inplace(b.copy(), UP)
+        yield f"numpy.can_move[{size}x{size}]", lambda b=board: core.can_move(b)
+        yield f"batch.move_left_single[{size}x{size}]", lambda b=board: batch.move(b[None], LEFT)
+        yield f"batch.move_left[{size}x{size}]", lambda bs=boards: batch.move_left(bs)
+
+
+def main(argv=None):
+    run_cli(__doc__.splitlines()[0], collect, BASELINE, argv)
+
+
+if __name__ == "__main__":
+    main()
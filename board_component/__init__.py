@@ -0,0 +1,109 @@
+"""Streamlit component that keeps the board DOM alive between reruns.
+
+The first render of a session sends the full board; after that only the
+cells that changed since the previous rerun are sent, tagged as ``spawn``,
+``merge`` or ``move`` so the front end can play the matching animation.
+If the front end falls out of step (for example after being remounted) it
+asks for a resync and the next rerun sends the full board again.
+
+Keyboard moves are applied optimistically in the browser with the same
+slide and merge rules as the Python engine, then sent to the server in
+batches. ``client_moves`` hands the new ones to the app, which validates
+them against the authoritative board and spawns tiles with its own RNG.
+Each render acknowledges how many moves were processed; the front end
+drops acknowledged moves and replays the rest on top of the server board.
+
+Static assets (``board.css``, ``board.js`` and the page stylesheet
+``page.css``) are served as files by the component route and referenced
+with a content hash, so browsers cache them and reruns only carry state.
+"""
+
+import hashlib
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+_board = components.declare_component("game2048_board", path=_FRONTEND_DIR)
+_ASSETS = ("board.css", "board.js", "page.css")
+
+
+@st.cache_resource
+def asset_urls():
+    """Fingerprinted asset URLs, relative to the component frame; built once per process."""
+    urls = {}
+    for name in _ASSETS:
+        with open(os.path.join(_FRONTEND_DIR, name), "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        urls[name] = f"{name}?v={digest}"
+    return urls
+
+
+def diff_boards(prev, cur, merged=(), spawned=()):
+    """Return ``[index, value, kind]`` for every flat cell that changed."""
+    tiles = []
+    for i, (old, new) in enumerate(zip(prev, cur)):
+        if i in spawned:
+            tiles.append([i, new, "spawn"])
+        elif i in merged:
+            tiles.append([i, new, "merge"])
+        elif old != new:
+            tiles.append([i, new, "move"])
+    return tiles
+
+
+def client_moves(key="game_board"):
+    """Return the directions the front end played since they were last read.
+
+    The front end resends every unacknowledged move with the index of the
+    first one, so moves are never lost when reruns coalesce and never
+    processed twice.
+    """
+    state = st.session_state
+    value = state.get(key) or {}
+    moves = value.get("moves")
+    if not moves:
+        return []
+    cid_key, done_key = f"_{key}_cid", f"_{key}_done"
+    if state.get(cid_key) != value["cid"]:
+        # A new frame numbers its moves from zero.
+        state[cid_key] = value["cid"]
+        state[done_key] = 0
+    done = state.get(done_key, 0)
+    first = value["first"]
+    new = moves[max(0, done - first):]
+    state[done_key] = max(done, first + len(moves))
+    return new
+
+
+def render_board(board, merged=(), spawned=(), key="game_board"):
+    """Render ``board`` through the persistent component.
+
+    ``merged`` and ``spawned`` hold the flat indices of cells produced by a
+    merge or a new tile since the previous rerun.
+    """
+    state = st.session_state
+    view_key, seq_key, resync_key = f"_{key}_view", f"_{key}_seq", f"_{key}_resync"
+    cur = board.reshape(-1).tolist()
+    prev = state.get(view_key)
+    seq = state.get(seq_key, 0)
+    request = state.get(key) or {}
+    resync = request.get("resync")
+
+    if prev is None or len(prev) != len(cur) or (resync is not None and resync != state.get(resync_key)):
+        state[resync_key] = resync
+        seq += 1
+        args = {"seq": seq, "size": board.shape[0], "full": cur}
+    else:
+        tiles = diff_boards(prev, cur, merged, spawned)
+        base = seq
+        if tiles:
+            seq += 1
+        args = {"seq": seq, "base": base, "tiles": tiles}
+
+    state[view_key] = cur
+    state[seq_key] = seq
+    args["cid"] = state.get(f"_{key}_cid")
+    args["ack"] = state.get(f"_{key}_done", 0)
+    return _board(key=key, default=None, assets=asset_urls(), **args)
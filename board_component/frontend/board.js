@@ -0,0 +1,372 @@
+// Persistent 2048 board. Python sends either a full board or the tile diff
+// since the last sequence number this frame acknowledged; the DOM is built
+// once and only changed tiles are touched afterwards. Loaded by index.html,
+// which forwards every render message to window.game2048Board.render.
+//
+// Keyboard moves are applied locally right away and queued. The queue is
+// sent to Python, which replays it on the authoritative board (spawning
+// tiles with its own RNG) and acknowledges how many moves it processed.
+// The board shown is always the server board plus the unacknowledged moves.
+(function () {
+    "use strict";
+
+    // Direction ids match game2048.UP, DOWN, LEFT, RIGHT.
+    const UP = 0, DOWN = 1, LEFT = 2, RIGHT = 3;
+    // Resend the queue if a batch has not been acknowledged after this long.
+    const RESEND_MS = 2000;
+
+    const host = window.parent;
+    const boardEl = document.getElementById("gameBoard");
+    const cid = Math.random().toString(36).slice(2);
+    let tiles = [];
+    let size = 0;
+    let lines = null;
+    let seq = null;
+    let confirmed = null; // last board acknowledged by the server
+    let shown = [];       // values currently in the DOM
+    let pending = [];     // {index, dir} played locally, not yet acknowledged
+    let nextIndex = 0;
+    let sentUpTo = 0;
+    let sentAt = 0;
+    let outgoing = { cid: cid };
+
+    // --- Streamlit component protocol ---
+
+    function send(type, data) {
+        host.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), "*");
+    }
+
+    function setFrameHeight() {
+        send("streamlit:setFrameHeight", { height: document.documentElement.scrollHeight });
+    }
+
+    function setValue(fields) {
+        outgoing = Object.assign({}, outgoing, fields);
+        send("streamlit:setComponentValue", { value: outgoing, dataType: "json" });
+    }
+
+    // --- Move rules (mirror core.move_inplace in game2048/core.py) ---
+
+    function buildLines(n) {
+        const byDir = [[], [], [], []];
+        for (let a = 0; a < n; a++) {
+            const left = [], right = [], up = [], down = [];
+            for (let b = 0; b < n; b++) {
+                left.push(a * n + b);
+                right.push(a * n + (n - 1 - b));
+                up.push(b * n + a);
+                down.push((n - 1 - b) * n + a);
+            }
+            byDir[LEFT].push(left);
+            byDir[RIGHT].push(right);
+            byDir[UP].push(up);
+            byDir[DOWN].push(down);
+        }
+        return byDir;
+    }
+
+    function slideLine(values, line, merges) {
+        let write = 0;
+        let last = 0;
+        let moved = false;
+        for (let read = 0; read < line.length; read++) {
+            let val = values[line[read]];
+            if (!val) {
+                continue;
+            }
+            if (val === last) {
+                val *= 2;
+                values[line[write - 1]] = val;
+                merges.push(line[write - 1]);
+                last = 0;
+                moved = true;
+            } else {
+                if (write !== read) {
+                    values[line[write]] = val;
+                    moved = true;
+                }
+                last = val;
+                write++;
+            }
+        }
+        for (let k = write; k < line.length; k++) {
+            values[line[k]] = 0;
+        }
+        return moved;
+    }
+
+    function applyMove(values, dir, merges) {
+        let moved = false;
+        lines[dir].forEach(function (line) {
+            moved = slideLine(values, line, merges) || moved;
+        });
+        return moved;
+    }
+
+    // --- Board DOM ---
+
+    function build(n) {
+        size = n;
+        lines = buildLines(n);
+        tiles = [];
+        shown = [];
+        boardEl.textContent = "";
+        for (let r = 0; r < n; r++) {
+            const row = document.createElement("div");
+            row.className = "board-row";
+            for (let c = 0; c < n; c++) {
+                const tile = document.createElement("div");
+                tile.className = "tile tile-0";
+                tile.addEventListener("animationend", function () {
+                    this.classList.remove("tile-new", "tile-merge");
+                });
+                row.appendChild(tile);
+                tiles.push(tile);
+                shown.push(null);
+            }
+            boardEl.appendChild(row);
+        }
+        layout();
+    }
+
+    // Shrink tiles so an NxN board fits the frame; 4x4 keeps its 90px tiles.
+    const MAX_TILE = 90;
+    const BOARD_CHROME = 38; // board padding plus body padding
+
+    function layout() {
+        if (!size) {
+            return;
+        }
+        const width = document.documentElement.clientWidth || window.innerWidth;
+        const fit = (width - BOARD_CHROME) / (size + (size - 1) * 0.133);
+        const tileSize = Math.max(24, Math.min(MAX_TILE, Math.floor(fit)));
+        boardEl.style.setProperty("--tile-size", tileSize + "px");
+        boardEl.style.setProperty("--tile-gap", Math.round(tileSize * 0.133) + "px");
+    }
+
+    function setTile(index, value, kind) {
+        const tile = tiles[index];
+        tile.className = "tile tile-" + value;
+        tile.textContent = value ? String(value) : "";
+        if (kind === "spawn" || kind === "merge") {
+            void tile.offsetWidth; // restart the animation if the class was just removed
+            tile.classList.add(kind === "spawn" ? "tile-new" : "tile-merge");
+        }
+    }
+
+    function shake() {
+        boardEl.classList.add("board-shake");
+        setTimeout(function () { boardEl.classList.remove("board-shake"); }, 500);
+    }
+
+    // Keep the parent page linked to the current fingerprinted stylesheet.
+    function linkPageStyles(href) {
+        const url = new URL(href, window.location.href).href;
+        const doc = host.document;
+        let link = doc.getElementById("game2048-page-css");
+        if (link && link.href === url) {
+            return;
+        }
+        if (!link) {
+            link = doc.createElement("link");
+            link.id = "game2048-page-css";
+            link.rel = "stylesheet";
+            doc.head.appendChild(link);
+        }
+        link.href = url;
+    }
+
+    // Draw ``values`` into the DOM, touching only cells that changed.
+    function paint(values, tags) {
+        let merged = false;
+        values.forEach(function (value, index) {
+            if (value !== shown[index]) {
+                const kind = tags[index];
+                setTile(index, value, kind);
+                shown[index] = value;
+                merged = merged || kind === "merge";
+            }
+        });
+        if (merged) {
+            playMergeSound();
+        }
+    }
+
+    // Show the server board with every unacknowledged local move replayed on top.
+    function redraw(tags) {
+        const values = confirmed.slice();
+        pending.forEach(function (move) {
+            const merges = [];
+            applyMove(values, move.dir, merges);
+            merges.forEach(function (index) { tags[index] = "merge"; });
+        });
+        paint(values, tags);
+    }
+
+    // Send the queue unless an earlier batch is still waiting for its ack.
+    function flush() {
+        if (!pending.length) {
+            return;
+        }
+        if (sentUpTo > pending[0].index && Date.now() - sentAt < RESEND_MS) {
+            return;
+        }
+        sentUpTo = pending[pending.length - 1].index + 1;
+        sentAt = Date.now();
+        setValue({ first: pending[0].index, moves: pending.map(function (move) { return move.dir; }) });
+    }
+
+    function localMove(dir) {
+        if (!confirmed) {
+            return false;
+        }
+        if (!applyMove(shown.slice(), dir, [])) {
+            return false;
+        }
+        pending.push({ index: nextIndex++, dir: dir });
+        redraw({});
+        flush();
+        return true;
+    }
+
+    function render(args) {
+        if (args.assets) {
+            linkPageStyles(args.assets["page.css"]);
+        }
+        const tags = {};
+        if (args.full) {
+            if (args.size !== size) {
+                build(args.size);
+            }
+            confirmed = args.full.slice();
+            seq = args.seq;
+            shake();
+        } else if (args.seq !== seq) {
+            if (args.base !== seq) {
+                // This frame missed an update (e.g. it was remounted): ask for a full board.
+                setValue({ resync: Date.now() + Math.random() });
+                return;
+            }
+            args.tiles.forEach(function (tile) {
+                confirmed[tile[0]] = tile[1];
+                if (tile[2] !== "move") {
+                    tags[tile[0]] = tile[2];
+                }
+            });
+            seq = args.seq;
+        }
+        if (args.cid === cid) {
+            pending = pending.filter(function (move) { return move.index >= args.ack; });
+        }
+        redraw(tags);
+        flush();
+        setFrameHeight();
+    }
+
+    window.game2048Board = { render: render };
+
+    // --- Sound effects ---
+
+    let audioContext = null;
+
+    function playSound(frequency, duration, type) {
+        if (!audioContext) {
+            try {
+                audioContext = new (window.AudioContext || window.webkitAudioContext)();
+            } catch (e) {
+                return;
+            }
+        }
+        const oscillator = audioContext.createOscillator();
+        const gainNode = audioContext.createGain();
+        oscillator.connect(gainNode);
+        gainNode.connect(audioContext.destination);
+        oscillator.frequency.setValueAtTime(frequency, audioContext.currentTime);
+        oscillator.type = type;
+        gainNode.gain.setValueAtTime(0.1, audioContext.currentTime);
+        gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + duration);
+        oscillator.start(audioContext.currentTime);
+        oscillator.stop(audioContext.currentTime + duration);
+    }
+
+    function playMoveSound() { playSound(440, 0.1, "square"); }
+    function playMergeSound() { playSound(523.25, 0.2, "sawtooth"); }
+
+    // --- Keyboard controls ---
+
+    const KEY_MOVES = {
+        ArrowUp: UP, w: UP, W: UP,
+        ArrowDown: DOWN, s: DOWN, S: DOWN,
+        ArrowLeft: LEFT, a: LEFT, A: LEFT,
+        ArrowRight: RIGHT, d: RIGHT, D: RIGHT,
+    };
+    const KEY_BUTTONS = { r: "🔄", R: "🔄", " ": "🔄", u: "↩️", z: "↩️", y: "↪️" };
+
+    function findButton(label) {
+        return Array.from(host.document.querySelectorAll("button")).find(function (btn) {
+            return btn.textContent.includes(label);
+        });
+    }
+
+    function showKeyIndicator(text) {
+        const doc = host.document;
+        const indicator = doc.createElement("div");
+        indicator.style.cssText = "position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%);"
+            + " background: rgba(246, 94, 59, 0.8); color: white; padding: 10px 20px; border-radius: 25px;"
+            + " font-weight: bold; z-index: 1000; pointer-events: none;";
+        indicator.textContent = text;
+        doc.body.appendChild(indicator);
+        indicator.animate([
+            { opacity: 0, transform: "translate(-50%, -50%) scale(0.5)" },
+            { opacity: 1, transform: "translate(-50%, -50%) scale(1.1)" },
+            { opacity: 0, transform: "translate(-50%, -50%) scale(1)" },
+        ], { duration: 500, easing: "ease-out" }).onfinish = function () { indicator.remove(); };
+    }
+
+    function onKeyDown(e) {
+        if (e.key in KEY_MOVES) {
+            e.preventDefault();
+            if (localMove(KEY_MOVES[e.key]) && e.key.startsWith("Arrow")) {
+                playMoveSound();
+                showKeyIndicator(e.key.replace("Arrow", ""));
+            }
+            return;
+        }
+        const label = KEY_BUTTONS[e.key];
+        if (!label) {
+            return;
+        }
+        e.preventDefault();
+        const button = findButton(label);
+        if (button) {
+            button.click();
+        }
+    }
+
+    window.addEventListener("resize", function () {
+        layout();
+        setFrameHeight();
+    });
+
+    // Replace the listener of any earlier frame so keys fire exactly once.
+    if (host.__game2048KeyDown) {
+        host.document.removeEventListener("keydown", host.__game2048KeyDown);
+    }
+    host.__game2048KeyDown = onKeyDown;
+    host.document.addEventListener("keydown", onKeyDown);
+    document.addEventListener("keydown", onKeyDown);
+
+    if (!host.__game2048HintShown) {
+        host.__game2048HintShown = true;
+        const hint = host.document.createElement("div");
+        hint.style.cssText = "position: fixed; bottom: 20px; right: 20px; background: rgba(0, 0, 0, 0.8);"
+            + " color: white; padding: 10px 15px; border-radius: 8px; font-size: 12px; z-index: 1000;"
+            + " opacity: 0.8; transition: opacity 0.3s ease;";
+        hint.textContent = "🎮 Arrow Keys or WASD to Play";
+        host.document.body.appendChild(hint);
+        setTimeout(function () {
+            hint.style.opacity = "0";
+            setTimeout(function () { hint.remove(); }, 300);
+        }, 5000);
+    }
+})();
@@ -0,0 +1,6 @@
+"""Game engines and tooling for 2048."""
+
+# Move directions shared by every engine.
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_NAMES = ("up", "down", "left", "right")
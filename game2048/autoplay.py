@@ -0,0 +1,102 @@
+"""Background move computation for autoplay.
+
+An ``Autoplayer`` runs a policy (any ``board -> direction`` function, such
+as ``core.suggest_move`` or ``rollout.best_move``) on its own thread.  The
+front-end never waits for it: it calls ``poll`` with the current board on
+every tick and gets a direction back only when one is ready and due.
+
+At most one board is in flight, so the worker never runs ahead of what the
+front-end has applied; if the page falls behind, the worker simply idles.
+A result for a board that has since changed (a manual move, an undo) is
+dropped and the new board is requested instead.  Moves are handed out no
+faster than ``rate`` per second.  ``stop`` cancels the worker, which also
+exits on its own after ``idle_timeout`` seconds without a request and is
+restarted by the next ``poll``.
+"""
+
+import queue
+import threading
+import time
+
+DEFAULT_RATE = 5.0
+DEFAULT_IDLE_TTL = 30.0
+# How often an idle worker wakes up to check for cancellation.
+_WAKEUP = 0.1
+
+
+class Autoplayer:
+    """Computes moves for one game on a background thread."""
+
+    def __init__(self, policy, rate=DEFAULT_RATE, idle_timeout=DEFAULT_IDLE_TTL, clock=time.monotonic):
+        self.policy = policy
+        self.interval = 1.0 / rate
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._requests = queue.Queue(maxsize=1)
+        self._results = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = None  # key of the board in flight
+        self._ready = None  # (key, direction) waiting until it is due
+        self._due = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        idle_since = self._clock()
+        while not self._stop.is_set():
+            try:
+                key, board = self._requests.get(timeout=_WAKEUP)
+            except queue.Empty:
+                if self._clock() - idle_since > self.idle_timeout:
+                    return
+                continue
+            direction = self.policy(board)
+            if self._stop.is_set():
+                return
+            self._results.put((key, direction))
+            idle_since = self._clock()
+
+    def _start(self):
+        # A result from a worker that timed out is still in the queue; a
+        # request it never picked up is resent by the next poll.
+        self._requests = queue.Queue(maxsize=1)
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, name="autoplay", daemon=True)
+        self._thread.start()
+
+    def poll(self, board):
+        """Return the next direction for ``board`` if it is ready and due, else None.
+
+        Never blocks.  Call it with the current board on every tick.
+        """
+        if self._stop.is_set():
+            return None
+        if not self.running:
+            self._start()
+        key = board.tobytes()
+        if self._ready is None:
+            try:
+                self._ready = self._results.get_nowait()
+            except queue.Empty:
+                pass
+        if self._ready is not None:
+            ready_key, direction = self._ready
+            if ready_key != key:
+                self._ready = self._pending = None
+            elif self._clock() >= self._due:
+                self._ready = self._pending = None
+                self._due = self._clock() + self.interval
+                return direction
+            else:
+                return None
+        if self._pending is None:
+            self._pending = key
+            self._requests.put((key, board.copy()))
+        return None
+
+    def stop(self):
+        """Cancel the worker; a search already running finishes and is discarded."""
+        self._stop.set()
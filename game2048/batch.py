@@ -0,0 +1,141 @@
+"""Vectorized engine that moves a whole batch of boards at once.
+
+Boards are stacked into an ``(N, size, size)`` integer array of tile values,
+the same layout the ndarray engine in ``game2048.core`` uses for a single board.
+Every function works on the full batch with NumPy operations; the only
+Python loops run over cell positions, never over boards.
+"""
+
+import numpy as np
+
+from . import DOWN, LEFT, RIGHT, UP
+
+_PERMUTATION_CACHE = {}
+
+
+def _permutations(size):
+    """Flat cell orders that turn each direction into a left move."""
+    perms = _PERMUTATION_CACHE.get(size)
+    if perms is None:
+        idx = np.arange(size * size).reshape(size, size)
+        perms = np.empty((4, size * size), dtype=np.intp)
+        perms[LEFT] = idx.reshape(-1)
+        perms[RIGHT] = np.fliplr(idx).reshape(-1)
+        perms[UP] = idx.T.reshape(-1)
+        perms[DOWN] = np.fliplr(idx.T).reshape(-1)
+        _PERMUTATION_CACHE[size] = perms
+    return perms
+
+
+def _compress(rows):
+    """Slide non-zero elements of every row to the left."""
+    order = np.argsort(rows == 0, axis=1, kind="stable")
+    return np.take_along_axis(rows, order, axis=1)
+
+
+def _slide_left(rows):
+    """Compress, merge and compress an ``(M, size)`` array of rows."""
+    rows = _compress(rows)
+    gain = np.zeros(len(rows), dtype=np.int64)
+    for i in range(rows.shape[1] - 1):
+        same = (rows[:, i] != 0) & (rows[:, i] == rows[:, i + 1])
+        doubled = rows[:, i] * 2
+        rows[:, i] = np.where(same, doubled, rows[:, i])
+        rows[:, i + 1] = np.where(same, 0, rows[:, i + 1])
+        gain += np.where(same, doubled, 0)
+    return _compress(rows), gain
+
+
+def move(boards, directions):
+    """Move every board in ``boards`` in the given direction(s).
+
+    ``directions`` is either a single direction or one direction per board.
+    Returns ``(new_boards, moved, score_gain)`` where ``moved`` and
+    ``score_gain`` have one entry per board.
+    """
+    boards = np.asarray(boards)
+    count, size = boards.shape[0], boards.shape[-1]
+    flat = boards.reshape(count, size * size)
+    perms = _permutations(size)[np.broadcast_to(directions, (count,))]
+    rows_idx = np.arange(count)[:, None]
+    oriented = flat[rows_idx, perms].reshape(count * size, size)
+    slid, gain = _slide_left(oriented)
+    result = np.empty_like(flat)
+    result[rows_idx, perms] = slid.reshape(count, size * size)
+    result = result.reshape(boards.shape)
+    moved = np.any(result != boards, axis=(1, 2))
+    return result, moved, gain.reshape(count, size).sum(axis=1)
+
+
+def move_left(boards):
+    return move(boards, LEFT)
+
+
+def move_right(boards):
+    return move(boards, RIGHT)
+
+
+def move_up(boards):
+    return move(boards, UP)
+
+
+def move_down(boards):
+    return move(boards, DOWN)
+
+
+def can_move(boards):
+    """Return a boolean mask of boards that still have a legal move."""
+    boards = np.asarray(boards)
+    empty = np.any(boards == 0, axis=(1, 2))
+    horizontal = np.any(boards[:, :, :-1] == boards[:, :, 1:], axis=(1, 2))
+    vertical = np.any(boards[:, :-1, :] == boards[:, 1:, :], axis=(1, 2))
+    return empty | horizontal | vertical
+
+
+def _slides(a, b):
+    """Per board: whether some tile in ``b`` can move onto or merge into ``a``."""
+    pairs = (b != 0) & ((a == 0) | (a == b))
+    return np.any(pairs, axis=(1, 2))
+
+
+def legal_mask(boards):
+    """Return a ``uint8`` array with bit ``1 << direction`` set for every legal move."""
+    boards = np.asarray(boards)
+    left, right = boards[:, :, :-1], boards[:, :, 1:]
+    top, bottom = boards[:, :-1, :], boards[:, 1:, :]
+    mask = np.zeros(len(boards), dtype=np.uint8)
+    mask |= _slides(left, right).astype(np.uint8) << LEFT
+    mask |= _slides(right, left).astype(np.uint8) << RIGHT
+    mask |= _slides(top, bottom).astype(np.uint8) << UP
+    mask |= _slides(bottom, top).astype(np.uint8) << DOWN
+    return mask
+
+
+def add_random_tile(boards, rng, mask=None):
+    """Spawn one tile on every board in place, drawing from ``rng``.
+
+    ``rng`` is a ``np.random.Generator``. Each selected board gets a 2 (90%)
+    or a 4 (10%) in a uniformly chosen empty cell. ``mask`` restricts the
+    spawn to a subset of boards. Returns a mask of boards that got a tile.
+    """
+    count, _, size = boards.shape
+    # Only read through ``flat``: it is a copy if ``boards`` is not contiguous.
+    flat = boards.reshape(count, -1)
+    keys = rng.random(flat.shape)
+    keys[flat != 0] = -1.0
+    cells = np.argmax(keys, axis=1)
+    spawned = keys[np.arange(count), cells] >= 0
+    if mask is not None:
+        spawned &= mask
+    values = np.where(rng.random(count) < 0.1, 4, 2)
+    rows = np.nonzero(spawned)[0]
+    boards[rows, cells[rows] // size, cells[rows] % size] = values[rows]
+    return spawned
+
+
+def new_boards(count, rng, size=4):
+    """Return ``count`` fresh boards with two tiles each."""
+    boards = np.zeros((count, size, size), dtype=int)
+    add_random_tile(boards, rng)
+    add_random_tile(boards, rng)
+    return boards
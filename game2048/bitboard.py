@@ -0,0 +1,267 @@
+"""Bitboard engine: the 4x4 board packed into one 64-bit integer.
+
+Each cell is a 4-bit nibble holding the log2 rank of its tile (0 means
+empty, 1 means 2, 2 means 4, ...).  Cell ``(r, c)`` lives at nibble
+``4 * r + c``, so row ``r`` is the 16-bit slice ``(board >> 16 * r) & 0xFFFF``
+with its leftmost cell in the lowest nibble.
+
+A nibble holds ranks up to 15, so 32768 is the largest tile.  Two 32768
+tiles do not merge here, although the ndarray engine merges them, and
+``pack`` rejects any tile above 32768 rather than wrapping it.
+
+All four directions go through 65536-entry row tables that are built once,
+cached on disk and memory-mapped by every process (see ``tables``).  The
+move functions keep the ``(board, moved, score_gain)`` contract of the
+ndarray engine in ``game2048.core``.
+"""
+
+import random
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from . import DOWN, LEFT, RIGHT, UP
+from .symmetry import transpose
+from .tables import load_tables
+
+ROW_MASK = 0xFFFF
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+_NIBBLE_LOW_BITS = 0x1111111111111111
+# Rank 15 (32768) is the largest tile a nibble can hold, so it never merges.
+MAX_RANK = 15
+# Bump when the row tables change so stale cache files are ignored.
+TABLES_VERSION = 3
+# Bits of _ROW_LEGAL: the row can slide left / right.
+_ROW_CAN_LEFT = 1
+_ROW_CAN_RIGHT = 2
+LEGAL_CACHE_SIZE = 65536
+
+
+# --- Row tables ---
+
+def _slide_ranks(ranks):
+    """Slide a list of ranks to the left.
+
+    Returns the new ranks, the gained score and a bit mask of the output
+    positions that hold a merged tile.
+    """
+    tiles = [r for r in ranks if r]
+    out = []
+    score = 0
+    merges = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1] and tiles[i] < MAX_RANK:
+            merges |= 1 << len(out)
+            out.append(tiles[i] + 1)
+            score += 1 << (tiles[i] + 1)
+            i += 2
+        else:
+            out.append(tiles[i])
+            i += 1
+    out += [0] * (len(ranks) - len(out))
+    return out, score, merges
+
+
+def _reverse_row(row):
+    return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12)
+
+
+def _build_tables():
+    row_left = array("H", bytes(2 * 65536))
+    row_right = array("H", bytes(2 * 65536))
+    score_left = array("I", bytes(4 * 65536))
+    score_right = array("I", bytes(4 * 65536))
+    row_legal = array("B", bytes(65536))
+    merge_left = array("B", bytes(65536))
+    merge_right = array("B", bytes(65536))
+    for row in range(65536):
+        ranks = [(row >> (4 * i)) & 0xF for i in range(4)]
+        out, score, merges = _slide_ranks(ranks)
+        row_left[row] = out[0] | (out[1] << 4) | (out[2] << 8) | (out[3] << 12)
+        score_left[row] = score
+        merge_left[row] = merges
+    for row in range(65536):
+        rev = _reverse_row(row)
+        row_right[row] = _reverse_row(row_left[rev])
+        score_right[row] = score_left[rev]
+        row_legal[row] = (_ROW_CAN_LEFT if row_left[row] != row else 0) | (_ROW_CAN_RIGHT if row_right[row] != row else 0)
+        merges = merge_left[rev]
+        merge_right[row] = sum(1 << (3 - k) for k in range(4) if merges >> k & 1)
+    return [row_left, row_right, score_left, score_right, row_legal, merge_left, merge_right]
+
+
+(_ROW_LEFT, _ROW_RIGHT, _SCORE_LEFT, _SCORE_RIGHT, _ROW_LEGAL,
+ _MERGE_LEFT, _MERGE_RIGHT) = load_tables("rows", TABLES_VERSION, _build_tables)
+
+
+# --- Packing ---
+
+def pack(board):
+    """Pack a 4x4 ndarray of tile values into a 64-bit integer.
+
+    Raises ``ValueError`` for a tile above 32768, which a nibble cannot hold.
+    """
+    packed = 0
+    for i, val in enumerate(board.flat):
+        val = int(val)
+        if val:
+            rank = val.bit_length() - 1
+            if rank > MAX_RANK:
+                raise ValueError(f"tile {val} is above the bitboard's largest tile {1 << MAX_RANK}")
+            packed |= rank << (4 * i)
+    return packed
+
+
+def unpack(board):
+    """Unpack a 64-bit integer into a 4x4 ndarray of tile values."""
+    out = np.zeros((4, 4), dtype=int)
+    flat = out.reshape(-1)
+    for i in range(16):
+        rank = (board >> (4 * i)) & 0xF
+        if rank:
+            flat[i] = 1 << rank
+    return out
+
+
+# --- Moves ---
+
+def _apply_rows(board, row_table, score_table):
+    result = 0
+    score = 0
+    for shift in (0, 16, 32, 48):
+        row = (board >> shift) & ROW_MASK
+        result |= row_table[row] << shift
+        score += score_table[row]
+    return result, score
+
+
+def move_left(board):
+    result, score = _apply_rows(board, _ROW_LEFT, _SCORE_LEFT)
+    return result, result != board, score
+
+
+def move_right(board):
+    result, score = _apply_rows(board, _ROW_RIGHT, _SCORE_RIGHT)
+    return result, result != board, score
+
+
+def move_up(board):
+    result, score = _apply_rows(transpose(board), _ROW_LEFT, _SCORE_LEFT)
+    result = transpose(result)
+    return result, result != board, score
+
+
+def move_down(board):
+    result, score = _apply_rows(transpose(board), _ROW_RIGHT, _SCORE_RIGHT)
+    result = transpose(result)
+    return result, result != board, score
+
+
+MOVES = {UP: move_up, DOWN: move_down, LEFT: move_left, RIGHT: move_right}
+
+
+def move(board, direction):
+    return MOVES[direction](board)
+
+
+def merged_cells(board, direction):
+    """Flat indices of the cells where moving ``board`` in ``direction`` merges two tiles."""
+    horizontal = direction in (LEFT, RIGHT)
+    rows = board if horizontal else transpose(board)
+    table = _MERGE_LEFT if direction in (LEFT, UP) else _MERGE_RIGHT
+    cells = []
+    for r in range(4):
+        merges = table[(rows >> (16 * r)) & ROW_MASK]
+        for k in range(4):
+            if merges >> k & 1:
+                cells.append(4 * r + k if horizontal else 4 * k + r)
+    return cells
+
+
+def move_array(board, direction, merged=None):
+    """Apply ``direction`` to an ndarray board using the bitboard tables.
+
+    If ``merged`` is a list, the flat index of every merged cell is
+    appended to it, as ``core.move_inplace`` does.
+    """
+    before = pack(board)
+    packed, moved, score_gain = MOVES[direction](before)
+    if merged is not None and moved:
+        merged.extend(merged_cells(before, direction))
+    return unpack(packed), moved, score_gain
+
+
+# --- Board queries and spawning ---
+
+def empty_cells(board):
+    """Return the nibble indices of all empty cells."""
+    return [i for i in range(16) if not (board >> (4 * i)) & 0xF]
+
+
+def _occupied(board):
+    """One bit per nibble (its lowest bit), set when the cell holds a tile."""
+    x = board | (board >> 1)
+    x |= x >> 2
+    return x & _NIBBLE_LOW_BITS
+
+
+def count_empty(board):
+    return 16 - bin(_occupied(board)).count("1")
+
+
+def max_rank(board):
+    return max((board >> (4 * i)) & 0xF for i in range(16))
+
+
+def max_tile(board):
+    rank = max_rank(board)
+    return 1 << rank if rank else 0
+
+
+def legal_mask(board):
+    """Bit ``1 << direction`` is set for every direction that changes the board.
+
+    Eight row-table lookups; no move is computed.
+    """
+    horizontal = (_ROW_LEGAL[board & ROW_MASK] | _ROW_LEGAL[(board >> 16) & ROW_MASK]
+                  | _ROW_LEGAL[(board >> 32) & ROW_MASK] | _ROW_LEGAL[board >> 48])
+    t = transpose(board)
+    vertical = (_ROW_LEGAL[t & ROW_MASK] | _ROW_LEGAL[(t >> 16) & ROW_MASK]
+                | _ROW_LEGAL[(t >> 32) & ROW_MASK] | _ROW_LEGAL[t >> 48])
+    mask = 0
+    if horizontal & _ROW_CAN_LEFT:
+        mask |= 1 << LEFT
+    if horizontal & _ROW_CAN_RIGHT:
+        mask |= 1 << RIGHT
+    if vertical & _ROW_CAN_LEFT:
+        mask |= 1 << UP
+    if vertical & _ROW_CAN_RIGHT:
+        mask |= 1 << DOWN
+    return mask
+
+
+# For callers that ask about the same boards repeatedly (front-ends, policies).
+# Searches see mostly new boards and are faster calling legal_mask directly.
+cached_legal_mask = lru_cache(maxsize=LEGAL_CACHE_SIZE)(legal_mask)
+
+
+def can_move(board):
+    """Early exit on an empty cell, otherwise any legal direction."""
+    return _occupied(board) != _NIBBLE_LOW_BITS or cached_legal_mask(board) != 0
+
+
+def add_random_tile(board, rng=random):
+    """Spawn a 2 (90%) or 4 (10%) in a random empty cell. Returns the new board."""
+    empties = empty_cells(board)
+    if not empties:
+        return board
+    i = rng.choice(empties)
+    rank = 2 if rng.random() < 0.1 else 1
+    return board | (rank << (4 * i))
+
+
+def new_board(rng=random):
+    board = add_random_tile(0, rng)
+    return add_random_tile(board, rng)
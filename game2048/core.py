@@ -0,0 +1,347 @@
+"""Core game logic shared by every front-end.
+
+The ndarray engine (``new_board``, ``move_left`` ... ``can_move`` and the
+allocation-free ``move_inplace``) plus the game-level operations the
+front-ends need: starting a game, playing a move with its spawn, undo/redo
+and hints.  Nothing here imports Streamlit or other UI code, so the
+simulator, benchmarks, workers and the terminal front-end can import it
+cheaply; ``2048.py`` is a thin Streamlit layer on top.
+
+Set ``GAME2048_ENGINE=bitboard`` to run 4x4 moves through the packed
+lookup-table engine.
+"""
+
+import os
+import random
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from . import DIRECTIONS, DOWN, LEFT, RIGHT, UP, batch
+from .history import pack_board, unpack_board
+from .instrument import count, stage
+from .rng import GameRng
+from .symmetry import canonical_array, from_canonical, mask_from_canonical
+
+BOARD_SIZE = 4
+BOARD_SIZES = (4, 5, 6, 8)
+ENGINE = os.environ.get("GAME2048_ENGINE", "numpy")
+LEGAL_CACHE_SIZE = 4096
+HINT_CACHE_SIZE = 1024
+# Processes a 4x4 hint search is split across; 1 searches in-process.
+HINT_WORKERS = int(os.environ.get("GAME2048_HINT_WORKERS", 1))
+
+
+# --- Board engine ---
+
+def new_board(size=BOARD_SIZE, rng=random):
+    board = np.zeros((size, size), dtype=int)
+    add_random_tile(board, rng)
+    add_random_tile(board, rng)
+    return board
+
+
+def add_random_tile(board, rng=random):
+    empties = list(zip(*np.where(board == 0)))
+    if not empties:
+        return False
+    r, c = rng.choice(empties)
+    board[r, c] = 4 if rng.random() < 0.1 else 2
+    return r, c
+
+
+def compress(row):
+    """Slide non-zero elements to the left (remove zeros)."""
+    new_row = [num for num in row if num != 0]
+    new_row += [0] * (len(row) - len(new_row))
+    return new_row
+
+
+def merge(row):
+    """Merge a row after compression. Returns new row and gained score."""
+    score = 0
+    for i in range(len(row) - 1):
+        if row[i] != 0 and row[i] == row[i + 1]:
+            row[i] *= 2
+            row[i + 1] = 0
+            score += row[i]
+    return row, score
+
+
+def move_left(board):
+    moved = False
+    score_gain = 0
+    new_board = np.zeros_like(board)
+    for i in range(len(board)):
+        row = list(board[i])
+        compressed = compress(row)
+        merged, gained = merge(compressed)
+        final = compress(merged)
+        new_board[i] = final
+        if not np.array_equal(new_board[i], board[i]):
+            moved = True
+        score_gain += gained
+    return new_board, moved, score_gain
+
+
+def move_right(board):
+    reversed_board = np.fliplr(board)
+    moved_board, moved, score_gain = move_left(reversed_board)
+    return np.fliplr(moved_board), moved, score_gain
+
+
+def move_up(board):
+    transposed = board.T
+    moved_board, moved, score_gain = move_left(transposed)
+    return moved_board.T, moved, score_gain
+
+
+def move_down(board):
+    transposed = board.T
+    moved_board, moved, score_gain = move_right(transposed)
+    return moved_board.T, moved, score_gain
+
+
+def can_move(board):
+    if np.any(board == 0):
+        return True
+    # check horizontal, then vertical neighbours
+    if np.any(board[:, :-1] == board[:, 1:]):
+        return True
+    return bool(np.any(board[:-1, :] == board[1:, :]))
+
+
+@lru_cache(maxsize=LEGAL_CACHE_SIZE)
+def _legal_mask(cells, dtype, size):
+    board = np.frombuffer(cells, dtype=dtype).reshape(1, size, size)
+    return int(batch.legal_mask(board)[0])
+
+
+@lru_cache(maxsize=LEGAL_CACHE_SIZE)
+def _exact_legal_mask(cells, dtype, size):
+    board = np.frombuffer(cells, dtype=dtype).reshape(size, size)
+    key, transform = canonical_array(board)
+    return mask_from_canonical(_legal_mask(key, dtype, size), transform)
+
+
+def legal_mask(board):
+    """4-bit mask with bit ``1 << direction`` set for every legal direction.
+
+    Cached by the exact board first, so the buttons and the game-over check
+    share one computation per position at the cost of one ``tobytes``.  Only
+    a miss canonicalises, and rotated or mirrored positions then share the
+    computed mask.
+    """
+    return _exact_legal_mask(board.tobytes(), board.dtype.str, len(board))
+
+
+@lru_cache(maxsize=None)
+def line_indices(size):
+    """Flat cell indices of every line, ordered in the direction tiles slide."""
+    idx = np.arange(size * size).reshape(size, size)
+    return {
+        LEFT: idx.tolist(),
+        RIGHT: np.fliplr(idx).tolist(),
+        UP: idx.T.tolist(),
+        DOWN: np.fliplr(idx.T).tolist(),
+    }
+
+
+def move_inplace(board, direction, merged=None):
+    """Slide and merge ``board`` in place. Returns (moved, score_gain).
+
+    Cells are read and written through a memoryview of the board buffer, so
+    no temporary boards or row lists are created and ``moved`` is tracked
+    while sliding instead of comparing boards afterwards. If ``merged`` is a
+    list, the flat index of every merged cell is appended to it.
+    """
+    if not board.flags.c_contiguous or not board.flags.writeable:
+        raise ValueError("move_inplace needs a writeable C-contiguous board")
+    cells = memoryview(board.reshape(-1))
+    moved = False
+    score_gain = 0
+    for line in line_indices(len(board))[direction]:
+        write = 0
+        last = 0
+        for read, idx in enumerate(line):
+            val = cells[idx]
+            if not val:
+                continue
+            if val == last:
+                # Merge into the tile written just before this one.
+                val *= 2
+                cells[line[write - 1]] = val
+                score_gain += val
+                if merged is not None:
+                    merged.append(line[write - 1])
+                last = 0
+                moved = True
+            else:
+                if write != read:
+                    cells[line[write]] = val
+                    moved = True
+                last = val
+                write += 1
+        for k in range(write, len(line)):
+            cells[line[k]] = 0
+    return moved, score_gain
+
+
+def _bitboard_move(fallback, direction):
+    """``fallback`` with 4x4 boards sent through the bitboard tables instead."""
+    def move(board):
+        if len(board) == 4:
+            return bitboard.move_array(board, direction)
+        return fallback(board)
+    move.__name__ = fallback.__name__
+    return move
+
+
+if ENGINE == "bitboard":
+    from . import bitboard
+
+    move_left = _bitboard_move(move_left, LEFT)
+    move_right = _bitboard_move(move_right, RIGHT)
+    move_up = _bitboard_move(move_up, UP)
+    move_down = _bitboard_move(move_down, DOWN)
+
+
+# --- Games ---
+
+def new_game(size=BOARD_SIZE, seed=None):
+    """Return a fresh game. The seed alone reproduces every spawn."""
+    # Deferred: replay loads the bitboard tables and store imports sqlite3.
+    from .replay import ReplayWriter
+    from .store import GameState
+
+    rng = GameRng(seed)
+    board = new_board(size, rng)
+    return GameState(board, 0, rng, ReplayWriter(board, seed=rng.seed))
+
+
+def play_move(game, direction, merged=None):
+    """Move the game board in place and spawn a tile if anything moved.
+
+    Records the move in the replay and undo history. Returns
+    ``(moved, spawned)`` where ``spawned`` is the flat index of the new
+    tile (or None). Merged cells are appended to ``merged`` if given.
+    """
+    board = game.board
+    before = (pack_board(board), game.score, game.rng.getstate())
+    with stage("move"):
+        if ENGINE == "bitboard" and len(board) == 4:
+            new_b, moved, gained = bitboard.move_array(board, direction, merged)
+            board[...] = new_b
+        else:
+            moved, gained = move_inplace(board, direction, merged)
+    if not moved:
+        count("blocked_moves")
+        return False, None
+    count("moves")
+    game.score += gained
+    game.score_gain = gained
+    with stage("spawn"):
+        spawned = add_random_tile(board, game.rng)
+    if not spawned:
+        return True, None
+    cell = int(spawned[0]) * len(board) + int(spawned[1])
+    value = int(board.flat[cell])
+    with stage("record"):
+        game.replay.record(direction, cell, value, board, game.score)
+        game.history.push(*before, (direction, cell, value))
+    return True, cell
+
+
+def _restore(game, entry):
+    key, score, rng_state, _ = entry
+    game.board = unpack_board(key, game.size)
+    game.score = score
+    game.rng.setstate(rng_state)
+    game.score_gain = 0
+    update_status(game)
+
+
+def undo_move(game):
+    """Restore the position before the last move. Returns whether there was one.
+
+    No move logic runs: the previous board is unpacked from the history.
+    """
+    entry = game.history.undo(pack_board(game.board), game.score, game.rng.getstate())
+    if entry is None:
+        return False
+    _restore(game, entry)
+    game.replay.truncate(len(game.replay) - 1)
+    return True
+
+
+def redo_move(game):
+    """Re-apply the last undone move. Returns whether there was one."""
+    entry = game.history.redo(pack_board(game.board), game.score, game.rng.getstate())
+    if entry is None:
+        return False
+    _restore(game, entry)
+    game.replay.record(*entry[3], game.board, game.score)
+    return True
+
+
+def update_status(game):
+    """Refresh the won / game-over flags from the current board."""
+    with stage("status"):
+        game.won = bool(np.any(game.board >= 2048))
+        game.game_over = legal_mask(game.board) == 0
+
+
+_hints = OrderedDict()  # (canonical cells, dtype, size) -> direction, least recently used first
+_hints_lock = threading.Lock()
+
+
+def _suggest_move(cells, dtype, size):
+    """``(direction, cacheable)`` for a canonical board.
+
+    A 4x4 answer is only cacheable if the search completed its minimum
+    depth; one cut short by the deadline (a cold or busy pool) is returned
+    but searched again next time.
+    """
+    board = np.frombuffer(cells, dtype=dtype).reshape(size, size)
+    if size == 4:
+        from . import expectimax
+
+        search = expectimax.searcher(workers=HINT_WORKERS)
+        direction = search.best_move(board)
+        return direction, direction is None or search.depth_reached >= search.min_depth
+    boards = np.repeat(board[None], len(DIRECTIONS), axis=0)
+    new_b, moved, gained = batch.move(boards, np.array(DIRECTIONS))
+    if not moved.any():
+        return None, True
+    # Biggest score gain first, then the emptiest board.
+    rank = np.where(moved, gained * (board.size + 1) + np.sum(new_b == 0, axis=(1, 2)), -1)
+    return DIRECTIONS[int(np.argmax(rank))], True
+
+
+def suggest_move(board):
+    """Best direction for a hint: expectimax on 4x4, greedy on other sizes.
+
+    The 4x4 search runs on ``HINT_WORKERS`` processes when there is more
+    than one.
+
+    Hints are cached per symmetry class: the search runs on the canonical
+    board and its answer is mapped back to this one.  Answers from a search
+    that ran out of time before its minimum depth are not cached.
+    """
+    key, transform = canonical_array(board)
+    key = (key, board.dtype.str, len(board))
+    with _hints_lock:
+        cached = key in _hints
+        if cached:
+            _hints.move_to_end(key)
+            direction = _hints[key]
+    if not cached:
+        direction, cacheable = _suggest_move(*key)
+        if cacheable:
+            with _hints_lock:
+                _hints[key] = direction
+                if len(_hints) > HINT_CACHE_SIZE:
+                    _hints.popitem(last=False)
+    return None if direction is None else from_canonical(direction, transform)
@@ -0,0 +1,437 @@
+"""Expectimax move search over the bitboard engine.
+
+Max nodes try every legal direction; chance nodes average over every empty
+cell with the same 90/10 split between 2s and 4s that ``add_random_tile``
+uses.  Results are cached in a bounded transposition table, branches whose
+probability falls below a cutoff are scored by the heuristic directly.
+Leaves are scored with the row-table heuristic from ``heuristic`` unless
+another ``evaluate`` is given.
+
+With a time budget the search deepens one ply at a time from
+``min_depth`` up to ``search_depth(board)``, which grows as the board fills
+up, always holding the answer of the last completed depth, and stops
+cleanly at the deadline.  If not even ``min_depth`` completes, the moves
+are ranked one ply deep.  Each pass searches the root moves best
+first by the previous pass's values.  Expectimax has nothing to prune, so
+the ordering does not make a pass cheaper; it makes the moves most likely
+to win the ones that finish when the deadline cuts a pass short.  Each
+pass costs a fraction of the next, so the shallow ones are cheap
+insurance.  ``depth_reached`` and
+``nodes_per_sec`` report how far each call got, and
+
+    python -m game2048.expectimax --time-budget 0.05
+
+plays a game and sums them up, for tuning the budget on a given machine.
+
+That heuristic does not change when the board is rotated or mirrored, so
+neither does a chance node's value; the table is keyed by the canonical
+form of each board and one entry serves all eight symmetric positions.
+A custom ``evaluate`` has to be symmetric too.
+
+``ParallelSearch`` splits the root over a process pool: one task per legal
+direction, or one per (direction, spawn) pair when there are more workers
+than directions.  Workers map the same cached lookup tables read-only and
+stop at the same deadline; each task starts with an empty transposition
+table, so at a fixed depth the answer does not depend on scheduling.  If
+the pool completes no depth in time, the answer comes from a one-ply
+search in the calling process.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+
+from . import DIRECTIONS
+from .bitboard import MOVES, count_empty, empty_cells, legal_mask, pack
+from .heuristic import default_heuristic
+from .symmetry import canonical_key
+
+DEFAULT_TIME_BUDGET = 0.05
+DEFAULT_TABLE_SIZE = 200_000
+DEFAULT_PROB_CUTOFF = 1e-4
+DEFAULT_MAX_DEPTH = 4
+# How often (in nodes) the search looks at the clock.
+_CLOCK_INTERVAL = 32
+
+
+class _Timeout(Exception):
+    pass
+
+
+class TranspositionTable:
+    """Board -> (depth, value) cache that evicts the least recently used entry."""
+
+    def __init__(self, max_size=DEFAULT_TABLE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, board, depth):
+        entry = self._entries.get(board)
+        if entry is None or entry[0] < depth:
+            return None
+        self._entries.move_to_end(board)
+        return entry[1]
+
+    def put(self, board, depth, value):
+        self._entries[board] = (depth, value)
+        self._entries.move_to_end(board)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def search_depth(board, min_depth=2, max_depth=DEFAULT_MAX_DEPTH):
+    """Pick a search depth: the fewer empty cells, the deeper the search."""
+    empties = count_empty(board)
+    if empties >= 8:
+        depth = min_depth
+    elif empties >= 4:
+        depth = min_depth + 1
+    else:
+        depth = min_depth + 2
+    return min(depth, max_depth)
+
+
+def _pick(values, previous):
+    """Best direction of a search pass, given the values it finished in search order.
+
+    A complete pass is called with ``previous=None``.  A pass cut short by
+    the deadline only counts if it finished the previous pass's best move
+    (searched first), so the comparison is between values of one depth;
+    otherwise the previous pass's answer stands.
+    """
+    if not values:
+        return previous
+    if previous is None or previous in values:
+        return max(values, key=values.get)
+    return previous
+
+
+class ExpectimaxSearch:
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, prob_cutoff=DEFAULT_PROB_CUTOFF,
+                 min_depth=2, max_depth=DEFAULT_MAX_DEPTH, table=None, evaluate=None):
+        self.time_budget = time_budget
+        self.prob_cutoff = prob_cutoff
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        # Leaf scorer for packed boards; the row-table heuristic by default.
+        self.evaluate = evaluate if evaluate is not None else default_heuristic().evaluate
+        self.nodes = 0
+        self.depth_reached = 0
+        self.elapsed = 0.0
+        self._deadline = None
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def best_move(self, board, depth=None):
+        """Return the best direction for ``board``, or None if no move is legal.
+
+        ``board`` may be a packed integer or a 4x4 ndarray.  With ``depth``
+        (or without a time budget) this is one pass at that depth, by
+        default ``search_depth(board)``.  Otherwise it deepens one ply at a
+        time from ``min_depth`` to ``search_depth(board)`` until the budget
+        runs out, searching each pass's moves in the order the previous pass
+        ranked them; see ``_pick`` for which answer wins when the clock
+        stops mid-pass.
+        ``depth_reached``, ``nodes`` and ``nodes_per_sec`` describe the call.
+        """
+        if isinstance(board, np.ndarray):
+            board = pack(board)
+        start = time.monotonic()
+        self.nodes = 0
+        self.depth_reached = 0
+        self._deadline = start + self.time_budget if self.time_budget else None
+
+        mask = legal_mask(board)
+        candidates = [(d, MOVES[d](board)[0]) for d in DIRECTIONS if mask >> d & 1]
+        if not candidates:
+            self.elapsed = 0.0
+            return None
+        if depth is None and self._deadline is None:
+            depth = search_depth(board, self.min_depth, self.max_depth)
+
+        best = None
+        for d in self._depths(board) if depth is None else (depth,):
+            values = {}
+            try:
+                for direction, new in candidates:
+                    values[direction] = self._chance_node(new, d - 1, 1.0)
+            except _Timeout:
+                best = _pick(values, best)
+                break
+            best = _pick(values, None)
+            self.depth_reached = d
+            candidates.sort(key=lambda c: values[c[0]], reverse=True)
+        if not self.depth_reached:
+            # Nothing completed in time: rank the moves by their afterstates.
+            best = _pick({d: self.evaluate(new) for d, new in candidates}, None)
+            self.depth_reached = 1
+        self.elapsed = time.monotonic() - start
+        return best
+
+    def _depths(self, board):
+        """Depths of the iterative deepening passes for ``board``."""
+        last = search_depth(board, self.min_depth, self.max_depth)
+        return range(min(self.min_depth, last), last + 1)
+
+    def _tick(self):
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % _CLOCK_INTERVAL == 0:
+            if time.monotonic() > self._deadline:
+                raise _Timeout
+
+    def _max_node(self, board, depth, prob):
+        self._tick()
+        best = 0.0
+        mask = legal_mask(board)
+        for direction, fn in MOVES.items():
+            if mask >> direction & 1:
+                value = self._chance_node(fn(board)[0], depth - 1, prob)
+                if value > best:
+                    best = value
+        return best
+
+    def _chance_node(self, board, depth, prob):
+        if depth <= 0 or prob < self.prob_cutoff:
+            return self.evaluate(board)
+        key = canonical_key(board)
+        cached = self.table.get(key, depth)
+        if cached is not None:
+            return cached
+        self._tick()
+
+        empties = empty_cells(board)
+        if not empties:
+            return self.evaluate(board)
+        prob /= len(empties)
+        total = 0.0
+        for i in empties:
+            shift = 4 * i
+            total += 0.9 * self._max_node(board | (1 << shift), depth, prob * 0.9)
+            total += 0.1 * self._max_node(board | (2 << shift), depth, prob * 0.1)
+        value = total / len(empties)
+        self.table.put(key, depth, value)
+        return value
+
+
+# --- Parallel root split ---
+
+# Workers stop this long before the deadline (at most a fifth of the budget),
+# so their results reach the caller and the answer is ready in time.
+_DEADLINE_GRACE = 0.02
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    """Process pool shared by every ParallelSearch with this many workers."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # Spawned, not forked: the app process runs server threads.
+            pool = _pools[workers] = ProcessPoolExecutor(workers, multiprocessing.get_context("spawn"))
+            # Start every worker and map its tables now, not during the first search.
+            for _ in range(workers):
+                pool.submit(_warm)
+        return pool
+
+
+def _warm():
+    """Importing this module maps the move tables; this maps the heuristic's."""
+    default_heuristic()
+
+
+def _search_task(kind, board, depth, prob, deadline, prob_cutoff, evaluate):
+    """Value of one root-level node, or None if ``deadline`` (time.monotonic) passed first."""
+    search = ExpectimaxSearch(time_budget=None, prob_cutoff=prob_cutoff, evaluate=evaluate)
+    search._deadline = deadline
+    node = search._chance_node if kind == "chance" else search._max_node
+    try:
+        return node(board, depth, prob), search.nodes
+    except _Timeout:
+        return None, search.nodes
+
+
+class ParallelSearch:
+    """Expectimax with the root split across a process pool.
+
+    Takes the same options as ``ExpectimaxSearch``.  ``evaluate`` is
+    pickled to the workers, so it must be a module-level function or a
+    bound method of a picklable object (``Heuristic`` pickles as its
+    weights).  Workers cannot share a table with the caller, so ``table``
+    only serves the caller's fallback search; each task starts empty.
+    """
+
+    def __init__(self, workers=None, time_budget=DEFAULT_TIME_BUDGET, prob_cutoff=DEFAULT_PROB_CUTOFF,
+                 min_depth=2, max_depth=DEFAULT_MAX_DEPTH, table=None, evaluate=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.prob_cutoff = prob_cutoff
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.table = table
+        self.evaluate = evaluate
+        self.nodes = 0
+        self.depth_reached = 0
+        self.elapsed = 0.0
+
+    def _tasks(self, candidates, depth):
+        """``(direction, weight, kind, board, depth, prob)`` for every root task."""
+        if len(candidates) >= self.workers or depth <= 1:
+            return [(d, 1.0, "chance", new, depth - 1, 1.0) for d, new in candidates]
+        # Split each direction's chance node into its spawns, weighted as _chance_node does.
+        tasks = []
+        for d, new in candidates:
+            empties = empty_cells(new)
+            for i in empties:
+                for tile, p in ((1, 0.9), (2, 0.1)):
+                    weight = p / len(empties)
+                    tasks.append((d, weight, "max", new | (tile << (4 * i)), depth - 1, weight))
+        return tasks
+
+    nodes_per_sec = ExpectimaxSearch.nodes_per_sec
+    _depths = ExpectimaxSearch._depths
+
+    def _pass(self, candidates, depth, deadline):
+        """Search every candidate at ``depth`` on the pool.
+
+        Returns the values of the fully searched directions, in candidate
+        order, and whether that was all of them.
+        """
+        pool = _pool(self.workers)
+        tasks = self._tasks(candidates, depth)
+        # Workers stop early enough for their results to arrive by the deadline.
+        stop = None if deadline is None else deadline - min(_DEADLINE_GRACE, 0.2 * self.time_budget)
+        futures = [pool.submit(_search_task, kind, b, dep, prob, stop, self.prob_cutoff, self.evaluate)
+                   for _, _, kind, b, dep, prob in tasks]
+        if deadline is None:
+            wait(futures)
+        else:
+            # Tasks still queued at the workers' stop time could not finish: drop
+            # them so the running ones report back without waiting in line.
+            wait(futures, max(0.0, stop - time.monotonic()))
+            for future in futures:
+                future.cancel()
+            wait(futures, max(0.0, deadline - time.monotonic()))
+
+        values = {d: 0.0 for d, _ in candidates}
+        for (direction, weight, *_), future in zip(tasks, futures):
+            if future.cancel() or not future.done():
+                values[direction] = None
+                continue
+            value, nodes = future.result()
+            self.nodes += nodes
+            if value is None:
+                values[direction] = None  # not fully searched
+            elif values[direction] is not None:
+                values[direction] += weight * value
+        searched = {d: v for d, v in values.items() if v is not None}
+        return searched, len(searched) == len(candidates)
+
+    def best_move(self, board, depth=None):
+        """Same contract as ``ExpectimaxSearch.best_move``, including iterative deepening."""
+        if isinstance(board, np.ndarray):
+            board = pack(board)
+        start = time.monotonic()
+        self.nodes = 0
+        self.depth_reached = 0
+        deadline = start + self.time_budget if self.time_budget else None
+
+        mask = legal_mask(board)
+        candidates = [(d, MOVES[d](board)[0]) for d in DIRECTIONS if mask >> d & 1]
+        if not candidates:
+            self.elapsed = 0.0
+            return None
+        if depth is None and deadline is None:
+            depth = search_depth(board, self.min_depth, self.max_depth)
+
+        best = None
+        for d in self._depths(board) if depth is None else (depth,):
+            values, complete = self._pass(candidates, d, deadline)
+            if not complete:
+                best = _pick(values, best)
+                break
+            best = _pick(values, None)
+            self.depth_reached = d
+            candidates.sort(key=lambda c: values[c[0]], reverse=True)
+        if not self.depth_reached:
+            # The pool finished nothing in time (still starting, or busy with
+            # other searches): a one-ply search here beats guessing.
+            fallback = ExpectimaxSearch(time_budget=None, prob_cutoff=self.prob_cutoff,
+                                        table=self.table, evaluate=self.evaluate)
+            best = fallback.best_move(board, depth=1)
+            self.nodes += fallback.nodes
+            self.depth_reached = 1
+        self.elapsed = time.monotonic() - start
+        return best
+
+
+def searcher(time_budget=DEFAULT_TIME_BUDGET, workers=None, **kwargs):
+    """A ``ParallelSearch`` if ``workers`` is above 1, else an ``ExpectimaxSearch``."""
+    if workers and workers > 1:
+        return ParallelSearch(workers, time_budget=time_budget, **kwargs)
+    return ExpectimaxSearch(time_budget=time_budget, **kwargs)
+
+
+def best_move(board, time_budget=DEFAULT_TIME_BUDGET, workers=None, **kwargs):
+    """Suggest a direction for ``board`` within ``time_budget`` seconds.
+
+    With ``workers`` above 1 the root is searched in parallel (see
+    ``ParallelSearch``).
+    """
+    return searcher(time_budget, workers, **kwargs).best_move(board)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report search depth and speed over one self-play game.")
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET, help="seconds per move")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument("--workers", type=int, default=1, help="processes to split the root across")
+    parser.add_argument("--moves", type=int, default=200, help="moves to play")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from .bitboard import add_random_tile, move, new_board
+
+    if args.workers > 1:
+        search = ParallelSearch(args.workers, args.time_budget, max_depth=args.max_depth)
+    else:
+        search = ExpectimaxSearch(args.time_budget, max_depth=args.max_depth)
+    rng = random.Random(args.seed)
+    board = new_board(rng)
+    depths, rates, latencies = [], [], []
+    for _ in range(args.moves):
+        direction = search.best_move(board)
+        if direction is None:
+            break
+        depths.append(search.depth_reached)
+        rates.append(search.nodes_per_sec)
+        latencies.append(search.elapsed)
+        board = add_random_tile(move(board, direction)[0], rng)
+    if not depths:
+        return
+    counts = {d: depths.count(d) for d in sorted(set(depths))}
+    print(f"{len(depths)} moves, budget {args.time_budget * 1e3:.0f} ms, {args.workers} worker(s)")
+    print("completed depth: " + "  ".join(f"{d}: {n}" for d, n in counts.items()))
+    print(f"nodes/s: median {np.median(rates):.0f}")
+    print(f"latency ms: p50 {np.percentile(latencies, 50) * 1e3:.1f}  p99 {np.percentile(latencies, 99) * 1e3:.1f}"
+          f"  max {max(latencies) * 1e3:.1f}")
+
+
+if __name__ == "__main__":
+    main()
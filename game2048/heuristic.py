@@ -0,0 +1,143 @@
+"""Position heuristic scored from per-row lookup tables.
+
+Every term of the heuristic (empty cells, merge potential, monotonicity,
+smoothness and the tile-sum penalty) depends on one row at a time, so it is
+precomputed for all 65536 packed rows.  A board is then scored with eight
+lookups: its four rows plus the four rows of its transpose.
+
+The tables depend on the weights, so they are built once per set of weights
+and cached on disk like the move tables (see ``tables``).  The file name
+carries a digest of the weights, so changing a weight builds a new table
+and the old one is never read by mistake.
+
+The defaults follow the well-tested weights of nneonneo's 2048-ai;
+smoothness is off unless given a weight.  ``GAME2048_HEURISTIC_WEIGHTS``
+overrides them for ``default_heuristic``, e.g. ``empty=300,merges=500``.
+"""
+
+import hashlib
+import os
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from .symmetry import transpose
+from .tables import load_tables
+
+DEFAULT_WEIGHTS = {
+    "lost": 200000.0,  # flat bonus per row, keeps every live position positive
+    "empty": 270.0,
+    "merges": 700.0,
+    "monotonicity": 47.0,
+    "monotonicity_power": 4.0,
+    "smoothness": 0.0,
+    "sum": 11.0,
+    "sum_power": 3.5,
+}
+# Bump when the row scoring below changes so stale cache files are ignored.
+TABLES_VERSION = 1
+
+
+def _score_row(ranks, w):
+    empty = merges = 0
+    prev = counter = 0
+    for rank in ranks:
+        if rank == 0:
+            empty += 1
+            continue
+        if rank == prev:
+            counter += 1
+        elif counter:
+            merges += 1 + counter
+            counter = 0
+        prev = rank
+    if counter:
+        merges += 1 + counter
+
+    mono_left = mono_right = 0.0
+    power = w["monotonicity_power"]
+    for a, b in zip(ranks, ranks[1:]):
+        if a > b:
+            mono_left += a ** power - b ** power
+        else:
+            mono_right += b ** power - a ** power
+    tiles = [r for r in ranks if r]
+    rough = sum(abs(a - b) for a, b in zip(tiles, tiles[1:]))
+    total = sum(r ** w["sum_power"] for r in ranks)
+    return (w["lost"] + w["empty"] * empty + w["merges"] * merges
+            - w["monotonicity"] * min(mono_left, mono_right)
+            - w["smoothness"] * rough - w["sum"] * total)
+
+
+def _build(weights):
+    table = array("d", bytes(8 * 65536))
+    for row in range(65536):
+        table[row] = _score_row([(row >> (4 * i)) & 0xF for i in range(4)], weights)
+    return [table]
+
+
+def _table_name(weights):
+    text = ",".join(f"{k}={weights[k]!r}" for k in sorted(weights))
+    return "heuristic-" + hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class Heuristic:
+    """Row-table evaluator for one set of weights."""
+
+    def __init__(self, **weights):
+        unknown = set(weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"unknown heuristic weights {sorted(unknown)}; choose from {sorted(DEFAULT_WEIGHTS)}")
+        self.weights = {k: float(v) for k, v in {**DEFAULT_WEIGHTS, **weights}.items()}
+        (self._rows,) = load_tables(_table_name(self.weights), TABLES_VERSION, lambda: _build(self.weights))
+        self._table = np.frombuffer(self._rows, dtype=np.float64)
+
+    def __reduce__(self):
+        # Pickle as the weights: a process gets its tables from the disk cache.
+        return _cached, (tuple(sorted(self.weights.items())),)
+
+    def evaluate(self, board):
+        """Score a packed 4x4 bitboard."""
+        rows = self._rows
+        t = transpose(board)
+        return (rows[board & 0xFFFF] + rows[(board >> 16) & 0xFFFF]
+                + rows[(board >> 32) & 0xFFFF] + rows[board >> 48]
+                + rows[t & 0xFFFF] + rows[(t >> 16) & 0xFFFF]
+                + rows[(t >> 32) & 0xFFFF] + rows[t >> 48])
+
+    def evaluate_array(self, boards):
+        """Score a 4x4 ndarray board, or an ``(N, 4, 4)`` stack of them."""
+        boards = np.asarray(boards)
+        if boards.shape[-2:] != (4, 4):
+            raise ValueError("the row tables only cover 4x4 boards")
+        ranks = np.minimum(np.log2(np.maximum(boards, 1)).astype(np.int64), 15)
+        shifts = 4 * np.arange(4)
+        rows = (ranks << shifts).sum(axis=-1)
+        cols = (ranks << shifts[:, None]).sum(axis=-2)
+        return self._table[rows].sum(axis=-1) + self._table[cols].sum(axis=-1)
+
+
+@lru_cache(maxsize=None)
+def _cached(items):
+    return Heuristic(**dict(items))
+
+
+def get_heuristic(**weights):
+    """Shared ``Heuristic`` for these weights; tables are built once per process."""
+    weights = {k: float(v) for k, v in {**DEFAULT_WEIGHTS, **weights}.items()}
+    return _cached(tuple(sorted(weights.items())))
+
+
+def parse_weights(text):
+    """Parse ``"name=value,name=value"`` into a weights dict."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def default_heuristic():
+    """The heuristic with ``GAME2048_HEURISTIC_WEIGHTS`` applied over the defaults."""
+    return get_heuristic(**parse_weights(os.environ.get("GAME2048_HEURISTIC_WEIGHTS", "")))
@@ -0,0 +1,107 @@
+"""Undo/redo history that stores boards as packed integers.
+
+A history entry is ``(key, score, rng_state, move)``, where ``key`` is the
+board packed by ``pack_board`` and ``move`` is the ``(direction, cell,
+value)`` step between that entry and its neighbour.  A 4x4 board packs into
+one 64-bit int, so an entry costs a few hundred bytes of Python objects
+instead of a numpy array per move.
+
+Undo and redo only move entries between two stacks and unpack one key;
+no move logic runs.  The undo stack is trimmed from the oldest end to stay
+within both ``max_depth`` entries and ``max_bytes``.  The defaults come
+from ``$GAME2048_UNDO_DEPTH`` and ``$GAME2048_UNDO_MAX_BYTES``.
+"""
+
+import os
+import sys
+from collections import deque
+
+import numpy as np
+
+DEFAULT_DEPTH = int(os.environ.get("GAME2048_UNDO_DEPTH", 100))
+DEFAULT_MAX_BYTES = int(os.environ.get("GAME2048_UNDO_MAX_BYTES", 64 * 1024))
+
+
+def pack_board(board):
+    """Pack a square ndarray board into an int of 4-bit ranks.
+
+    Cell ``i`` (row-major) lives at nibble ``i``, as in ``bitboard``.  Boards
+    holding a tile above 32768 fall back to one byte per rank.
+    """
+    ranks = [int(v).bit_length() - 1 if v else 0 for v in board.flat]
+    if max(ranks) > 15:
+        return bytes(ranks)
+    packed = 0
+    for i, rank in enumerate(ranks):
+        packed |= rank << (4 * i)
+    return packed
+
+
+def unpack_board(key, size):
+    """Inverse of ``pack_board``."""
+    if isinstance(key, bytes):
+        ranks = list(key)
+    else:
+        ranks = [(key >> (4 * i)) & 0xF for i in range(size * size)]
+    return np.array([1 << r if r else 0 for r in ranks], dtype=int).reshape(size, size)
+
+
+def _entry_bytes(entry):
+    return sys.getsizeof(entry) + sum(sys.getsizeof(item) for item in entry)
+
+
+class History:
+    def __init__(self, max_depth=DEFAULT_DEPTH, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def _push_undo(self, entry):
+        self._undo.append(entry)
+        self.nbytes += _entry_bytes(entry)
+        while self._undo and (len(self._undo) > self.max_depth or self.nbytes > self.max_bytes):
+            self.nbytes -= _entry_bytes(self._undo.popleft())
+
+    def push(self, key, score, rng_state, move):
+        """Record the state before ``move`` was played; clears the redo stack."""
+        self._push_undo((key, score, rng_state, move))
+        self._redo.clear()
+
+    def undo(self, key, score, rng_state):
+        """Step back from the given current state.
+
+        Returns the previous ``(key, score, rng_state, move)``, where ``move``
+        is the step being undone, or None when there is nothing to undo.
+        """
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self.nbytes -= _entry_bytes(entry)
+        self._redo.append((key, score, rng_state, entry[3]))
+        return entry
+
+    def redo(self, key, score, rng_state):
+        """Step forward again. Returns the next entry and the move that reaches it."""
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._push_undo((key, score, rng_state, entry[3]))
+        return entry
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.nbytes = 0
@@ -0,0 +1,165 @@
+"""Optional per-stage timing for the move hot path.
+
+Code marks a stage with ``with stage("move"):``.  The timing goes to the
+``Recorder`` that is active on the current thread.  Streamlit runs each
+session's script on its own thread, so the app makes the session's
+recorder active for the length of one rerun.  With no active recorder,
+``stage`` returns a shared no-op context manager, which costs one
+thread-local lookup.
+
+A recorder keeps the last ``capacity`` samples of each stage in a ring
+buffer plus plain counters. ``stats`` reports p50/p90/p99/max over that
+window.  ``profile`` runs one call under cProfile, and ``start_profile`` /
+``profile_report`` bracket code that is not a single call, such as one
+Streamlit rerun.
+
+    rec = Recorder()
+    with rec.active():
+        play_move(game, UP)
+    rec.stats()["move"]["p99"]
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1024
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, time.perf_counter() - self.start)
+
+
+class Recorder:
+    """Ring buffers of stage timings (seconds) and event counters for one session."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counters = Counter()
+        self._samples = {}  # stage -> list used as a ring buffer
+        self._totals = Counter()  # stage -> samples ever recorded
+
+    def record(self, name, seconds):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = [0.0] * self.capacity
+        n = self._totals[name]
+        samples[n % self.capacity] = seconds
+        self._totals[name] = n + 1
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def samples(self, name):
+        """The retained samples of one stage, oldest first."""
+        n = self._totals[name]
+        samples = self._samples.get(name, [])
+        if n <= self.capacity:
+            return samples[:n]
+        start = n % self.capacity
+        return samples[start:] + samples[:start]
+
+    def stats(self):
+        """``{stage: {"count", "p50", "p90", "p99", "max"}}`` in seconds over the window."""
+        out = {}
+        for name, total in self._totals.items():
+            window = np.array(self.samples(name))
+            row = {"count": total}
+            for p, value in zip(PERCENTILES, np.percentile(window, PERCENTILES)):
+                row[f"p{p}"] = float(value)
+            row["max"] = float(window.max())
+            out[name] = row
+        return out
+
+    def histogram(self, name, bins=20):
+        """``(counts, edges)`` of one stage's retained samples, as ``np.histogram``."""
+        return np.histogram(np.array(self.samples(name)), bins=bins)
+
+    def reset(self):
+        self.counters.clear()
+        self._samples.clear()
+        self._totals.clear()
+
+    @contextmanager
+    def active(self):
+        """Send ``stage`` and ``count`` calls on this thread here until exit."""
+        previous = getattr(_local, "recorder", None)
+        _local.recorder = self
+        try:
+            yield self
+        finally:
+            _local.recorder = previous
+
+
+def activate(recorder):
+    """Make ``recorder`` (or None) the active one on this thread, without a ``with`` block."""
+    _local.recorder = recorder
+
+
+def stage(name):
+    """Context manager timing ``name`` into the active recorder, if any."""
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        return _NULL
+    return _Stage(recorder, name)
+
+
+def count(name, n=1):
+    """Bump a counter on the active recorder, if any."""
+    recorder = getattr(_local, "recorder", None)
+    if recorder is not None:
+        recorder.counters[name] += n
+
+
+def format_stats(stats):
+    """Text table of ``Recorder.stats()`` in microseconds."""
+    lines = [f"{'stage':<14} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"]
+    for name, row in sorted(stats.items()):
+        times = " ".join(f"{row[k] * 1e6:>9.0f}" for k in ("p50", "p90", "p99", "max"))
+        lines.append(f"{name:<14} {row['count']:>7} {times}")
+    return "\n".join(lines)
+
+
+def start_profile():
+    """Start a cProfile session; pass it to ``profile_report`` when done."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def profile_report(profiler, sort="cumulative", limit=30):
+    """Stop ``profiler`` and return its top ``limit`` functions as text."""
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def profile(fn, *args, sort="cumulative", limit=30, **kwargs):
+    """Run ``fn`` under cProfile; returns ``(result, report text)``."""
+    profiler = start_profile()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        report = profile_report(profiler, sort, limit)
+    return result, report
@@ -0,0 +1,263 @@
+"""N-tuple network value function for 4x4 boards, trained by TD learning.
+
+The network scores a board as the sum of weights looked up by a few small
+patterns of cells (n-tuples).  Each pattern has one weight table indexed by
+the ranks of its cells, and is read under all eight symmetries of the
+board, so one table learns from every rotation and reflection.  With the
+default five 4-cell patterns a board costs 40 lookups.
+
+Training is TD(0) on afterstates (the board right after a move, before
+the spawn): a batch of self-play games runs on the batch engine, every
+game plays the move with the best ``gain + value(afterstate)``, and the
+value of its previous afterstate is pulled towards that.  The updates of
+one step are averaged per weight and applied in one vectorized pass, so a
+weight shared by the whole batch (say, an empty row) does not get
+hundreds of steps at once.
+
+Weights are saved with ``tables.save_tables`` and loaded with
+``tables.map_tables``, so a trained network is one memory-mapped file
+shared by every process that plays with it.
+
+    python -m game2048.ntuple --games 100000 --out weights.bin
+    python -m game2048.simulate --policy ntuple --weights weights.bin
+"""
+
+import argparse
+import os
+import time
+from array import array
+
+import numpy as np
+
+from . import DIRECTIONS, batch
+from .symmetry import apply, flip_h, flip_v, transpose
+from .tables import cache_dir, map_tables, save_tables
+
+# Rows and 2x2 squares: small tables (5 x 64K weights) that learn quickly.
+PATTERNS_4 = ((0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 4, 5), (1, 2, 5, 6), (5, 6, 9, 10))
+# Four 6-cell patterns: 268 MB of float32 weights, much stronger given time.
+PATTERNS_6 = ((0, 1, 2, 3, 4, 5), (4, 5, 6, 7, 8, 9), (0, 1, 2, 4, 5, 6), (4, 5, 6, 8, 9, 10))
+PATTERN_SETS = {"4": PATTERNS_4, "6": PATTERNS_6}
+
+DEFAULT_ALPHA = 0.1
+DEFAULT_BATCH = 256
+DEFAULT_CHECKPOINT_EVERY = 1000
+
+_SYMMETRIES = [apply(np.arange(16).reshape(4, 4), t).ravel() for t in range(8)]
+
+
+def default_weights_path():
+    """``$GAME2048_NTUPLE_WEIGHTS``, else ``ntuple.bin`` in the cache directory."""
+    path = os.environ.get("GAME2048_NTUPLE_WEIGHTS")
+    return path or str(cache_dir() / "ntuple.bin")
+
+
+def _images(board):
+    """The eight symmetric images of a packed board."""
+    h = flip_h(board)
+    v = flip_v(board)
+    hv = flip_v(h)
+    return board, h, v, hv, transpose(board), transpose(h), transpose(v), transpose(hv)
+
+
+def _runs(pattern):
+    """``(shift, mask, position)`` for each stretch of adjacent cells in one row."""
+    runs = []
+    for j, cell in enumerate(pattern):
+        if runs and cell == runs[-1][0] + runs[-1][1] and cell % 4:
+            start, length, pos = runs[-1]
+            runs[-1] = (start, length + 1, pos)
+        else:
+            runs.append((cell, 1, j))
+    return tuple((4 * start, (1 << 4 * length) - 1, 4 * pos) for start, length, pos in runs)
+
+
+def ranks(boards):
+    """Nibble ranks (log2 of each tile, capped at 15) of ``(N, 4, 4)`` value boards, as ``(N, 16)``."""
+    flat = np.asarray(boards).reshape(len(boards), 16)
+    return np.minimum(np.log2(np.maximum(flat, 1)).astype(np.int64), 15)
+
+
+class NTupleNetwork:
+    """Pattern weight tables plus fast scalar and batched evaluation."""
+
+    def __init__(self, patterns=PATTERNS_4, weights=None, games=0):
+        self.patterns = tuple(tuple(p) for p in patterns)
+        self.offsets = []
+        size = 0
+        for pattern in self.patterns:
+            self.offsets.append(size)
+            size += 16 ** len(pattern)
+        self.weights = np.zeros(size, dtype=np.float32) if weights is None else weights
+        if len(self.weights) != size:
+            raise ValueError(f"expected {size} weights for these patterns, got {len(self.weights)}")
+        self.games = games
+        self.features_per_board = 8 * len(self.patterns)
+        self._lookup = memoryview(self.weights)
+        self._runs = [(offset, _runs(p)) for offset, p in zip(self.offsets, self.patterns)]
+        # Cells of every pattern under every symmetry, and the rank shifts.
+        self._cells = [
+            (np.array([sym[list(p)] for sym in _SYMMETRIES]), 4 * np.arange(len(p)), offset)
+            for offset, p in zip(self.offsets, self.patterns)
+        ]
+
+    # --- Evaluation ---
+
+    def value(self, board):
+        """Value of one packed 4x4 bitboard."""
+        w = self._lookup
+        total = 0.0
+        for image in _images(board):
+            for index, runs in self._runs:
+                for shift, mask, pos in runs:
+                    index += ((image >> shift) & mask) << pos
+                total += w[index]
+        return total
+
+    def features(self, boards):
+        """Weight indices of ``(N, 4, 4)`` value boards, as ``(N, 8 * patterns)``."""
+        r = ranks(boards)
+        return np.concatenate(
+            [(r[:, cells] << shifts).sum(axis=-1) + offset for cells, shifts, offset in self._cells], axis=1
+        )
+
+    def values(self, boards):
+        """Values of ``(N, 4, 4)`` value boards."""
+        return self.weights[self.features(boards)].sum(axis=1)
+
+    # --- Checkpoints ---
+
+    def save(self, path):
+        spec = array("B", [len(self.patterns)])
+        for pattern in self.patterns:
+            spec.append(len(pattern))
+            spec.extend(pattern)
+        weights = array("f")
+        weights.frombytes(self.weights.astype(np.float32).tobytes())
+        save_tables(path, [spec, array("Q", [self.games]), weights])
+
+    @classmethod
+    def load(cls, path):
+        """Map a saved network read-only; ``train`` copies the weights first."""
+        try:
+            spec, meta, weights = map_tables(path)
+        except ValueError:
+            raise ValueError(f"{path} is not an n-tuple network") from None
+        if weights.format != "f":
+            raise ValueError(f"{path} is not an n-tuple network")
+        patterns, i = [], 1
+        for _ in range(spec[0]):
+            patterns.append(tuple(spec[i + 1:i + 1 + spec[i]]))
+            i += 1 + spec[i]
+        return cls(patterns, np.frombuffer(weights, dtype=np.float32), games=meta[0])
+
+
+# --- Training ---
+
+def train(net, games, batch_size=DEFAULT_BATCH, alpha=DEFAULT_ALPHA, seed=0,
+          checkpoint=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, report=None):
+    """Train ``net`` in place on ``games`` self-play games, ``batch_size`` at a time.
+
+    ``alpha`` is the fraction of the TD error corrected per update, spread
+    over the board's features.  Every ``checkpoint_every`` finished games
+    the network is saved to ``checkpoint`` (if given) and ``report`` (if
+    given) is called with ``(games done, scores, max tiles)`` of that
+    window.  Returns the final score of every game.
+    """
+    if not net.weights.flags.writeable:
+        net.__init__(net.patterns, net.weights.copy(), net.games)
+    weights = net.weights
+    step = alpha / net.features_per_board
+    rng = np.random.default_rng(seed)
+
+    count = min(batch_size, games)
+    boards = batch.new_boards(count, rng)
+    started = count
+    active = np.ones(count, dtype=bool)
+    has_prev = np.zeros(count, dtype=bool)
+    prev = np.zeros((count, net.features_per_board), dtype=np.int64)
+    score = np.zeros(count, dtype=np.int64)
+    scores, tiles = [], []
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        n = len(idx)
+        after, moved, gain = batch.move(np.repeat(boards[idx], len(DIRECTIONS), axis=0), np.tile(DIRECTIONS, n))
+        feats = net.features(after).reshape(n, len(DIRECTIONS), -1)
+        moved = moved.reshape(n, -1)
+        gain = gain.reshape(n, -1)
+        q = weights[feats].sum(axis=-1) + gain
+        q[~moved] = -np.inf
+        best = q.argmax(axis=1)
+        alive = moved.any(axis=1)
+        rows = np.arange(n)
+
+        # TD(0): pull each game's previous afterstate towards reward + value of the next one.
+        target = np.where(alive, q[rows, best], 0.0)
+        update = has_prev[idx]
+        if update.any():
+            f = prev[idx[update]]
+            error = target[update] - weights[f].sum(axis=1)
+            # Average the updates per weight: a weight that many games (or one
+            # board's symmetric images) touch this step still moves only one step.
+            touched, where, hits = np.unique(f.ravel(), return_inverse=True, return_counts=True)
+            total = np.bincount(where.ravel(), weights=np.repeat(step * error, f.shape[1]))
+            weights[touched] += (total / hits).astype(np.float32)
+
+        live = idx[alive]
+        if len(live):
+            next_boards = after.reshape(n, len(DIRECTIONS), 4, 4)[rows, best][alive]
+            batch.add_random_tile(next_boards, rng)
+            boards[live] = next_boards
+            score[live] += gain[rows, best][alive]
+            prev[live] = feats[rows, best][alive]
+            has_prev[live] = True
+
+        for g in idx[~alive]:
+            scores.append(int(score[g]))
+            tiles.append(int(boards[g].max()))
+            net.games += 1
+            if started < games:
+                boards[g] = batch.new_boards(1, rng)[0]
+                score[g] = 0
+                has_prev[g] = False
+                started += 1
+            else:
+                active[g] = False
+            if len(scores) % checkpoint_every == 0:
+                if checkpoint:
+                    net.save(checkpoint)
+                if report:
+                    report(len(scores), scores[-checkpoint_every:], tiles[-checkpoint_every:])
+    if checkpoint:
+        net.save(checkpoint)
+    return scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train an n-tuple network by TD self-play.")
+    parser.add_argument("--games", type=int, default=10000, help="self-play games to train on")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="games played side by side")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="learning rate")
+    parser.add_argument("--patterns", choices=sorted(PATTERN_SETS), default="4", help="4- or 6-cell patterns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="checkpoint file (default: $GAME2048_NTUPLE_WEIGHTS)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint file")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY)
+    args = parser.parse_args(argv)
+
+    out = args.out or default_weights_path()
+    net = NTupleNetwork.load(out) if args.resume else NTupleNetwork(PATTERN_SETS[args.patterns])
+    start = time.perf_counter()
+
+    def report(done, scores, tiles):
+        rate = sum(t >= 2048 for t in tiles) / len(tiles)
+        print(f"{net.games:>9} games  mean score {np.mean(scores):>8.0f}  max {max(scores):>7}"
+              f"  2048 rate {rate:6.1%}  {time.perf_counter() - start:7.0f}s", flush=True)
+
+    train(net, args.games, args.batch, args.alpha, args.seed, out, args.checkpoint_every, report)
+    print(f"weights saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Move policies for headless play.
+
+A policy is a callable ``policy(board, rng) -> direction`` that takes a
+packed bitboard and a ``GameRng`` (or ``random.Random``) and returns the direction to play,
+or None when no move is legal.
+"""
+
+from . import DIRECTIONS
+from .bitboard import MOVES, count_empty, legal_mask
+
+
+def legal_moves(board):
+    """Return ``(direction, new_board, score_gain)`` for every legal move."""
+    mask = legal_mask(board)
+    moves = []
+    for direction in DIRECTIONS:
+        if mask >> direction & 1:
+            new, _, gain = MOVES[direction](board)
+            moves.append((direction, new, gain))
+    return moves
+
+
+def random_policy(board, rng):
+    moves = legal_moves(board)
+    if not moves:
+        return None
+    return rng.choice(moves)[0]
+
+
+def greedy_policy(board, rng):
+    """Take the biggest immediate score gain, then the emptiest board."""
+    moves = legal_moves(board)
+    if not moves:
+        return None
+    best = max((gain, count_empty(new)) for _, new, gain in moves)
+    return rng.choice([d for d, new, gain in moves if (gain, count_empty(new)) == best])
+
+
+def expectimax_policy(time_budget=0.05, depth=None):
+    """Build a policy around one ExpectimaxSearch so its table is reused.
+
+    With a fixed ``depth`` the search ignores the clock, which keeps runs
+    reproducible.
+    """
+    from .expectimax import ExpectimaxSearch
+
+    search = ExpectimaxSearch(time_budget=None if depth else time_budget)
+
+    def policy(board, rng):
+        return search.best_move(board, depth=depth)
+
+    return policy
+
+
+def ntuple_policy(weights=None):
+    """Build a policy that plays the move with the best gain plus n-tuple value.
+
+    ``weights`` is a checkpoint written by ``game2048.ntuple``; by default
+    ``ntuple.default_weights_path()``.
+    """
+    from .ntuple import NTupleNetwork, default_weights_path
+
+    net = NTupleNetwork.load(weights or default_weights_path())
+
+    def policy(board, rng):
+        moves = legal_moves(board)
+        if not moves:
+            return None
+        return max(moves, key=lambda move: move[2] + net.value(move[1]))[0]
+
+    return policy
+
+
+POLICIES = {
+    "random": lambda **options: random_policy,
+    "greedy": lambda **options: greedy_policy,
+    "expectimax": expectimax_policy,
+    "ntuple": ntuple_policy,
+}
+
+
+def make_policy(name, **options):
+    try:
+        factory = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"unknown policy {name!r}; choose from {sorted(POLICIES)}") from None
+    return factory(**options)
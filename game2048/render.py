@@ -0,0 +1,86 @@
+"""Static HTML rendering of a board, for exports and benchmarks.
+
+The app draws the live board with ``board_component``, which only sends
+changed tiles; these helpers build the full markup in one go.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+CSS_PATH = Path(__file__).resolve().parent.parent / "board_component" / "frontend" / "page.css"
+
+TILE_COLORS = {
+    0: ("#cdc1b4", "#776e65"),
+}
+# Enhanced color palette with gradients
+base_colors = [
+    ("linear-gradient(135deg, #eee4da, #ede0c8)", "#776e65"),  # 2
+    ("linear-gradient(135deg, #ede0c8, #f2b179)", "#776e65"),  # 4
+    ("linear-gradient(135deg, #f2b179, #f59563)", "#f9f6f2"),  # 8
+    ("linear-gradient(135deg, #f59563, #f67c5f)", "#f9f6f2"),  # 16
+    ("linear-gradient(135deg, #f67c5f, #f65e3b)", "#f9f6f2"),  # 32
+    ("linear-gradient(135deg, #f65e3b, #edcf72)", "#f9f6f2"),  # 64
+    ("linear-gradient(135deg, #edcf72, #edcc61)", "#f9f6f2"),  # 128
+    ("linear-gradient(135deg, #edcc61, #edc850)", "#f9f6f2"),  # 256
+    ("linear-gradient(135deg, #edc850, #edc53f)", "#f9f6f2"),  # 512
+    ("linear-gradient(135deg, #edc53f, #edc22e)", "#f9f6f2"),  # 1024
+    ("linear-gradient(135deg, #edc22e, #ff6b35)", "#f9f6f2"),  # 2048
+    ("linear-gradient(135deg, #ff6b35, #f7931e)", "#f9f6f2"),  # 4096
+    ("linear-gradient(135deg, #f7931e, #ffcc02)", "#f9f6f2"),  # 8192
+]
+for i, col in enumerate(base_colors, start=1):
+    TILE_COLORS[2 ** i] = col
+
+
+@lru_cache(maxsize=None)
+def get_css_styles():
+    """Page stylesheet wrapped in a <style> tag, for static exports.
+
+    The app itself loads ``page.css`` as a fingerprinted file through the
+    board component, so browsers cache it instead of receiving it per rerun.
+    """
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>\n"
+
+
+def tile_style(val, is_new=False, is_merge=False):
+    """Generate CSS class for tile styling"""
+    if val == 0:
+        return "tile tile-0"
+    
+    classes = [f"tile tile-{val}"]
+    if is_new:
+        classes.append("tile-new")
+    if is_merge:
+        classes.append("tile-merge")
+    
+    return " ".join(classes)
+
+
+def render_board_html(board, score, score_gain=0):
+    """Render the full game board as static HTML.
+
+    The app itself draws the board with ``board_component``, which only sends
+    changed tiles; this full render is kept for exports and benchmarks.
+    """
+    html = f"""
+    <div style='display:flex; align-items:flex-start; gap:30px; flex-wrap:wrap;'>
+        <div class='game-board' id='gameBoard'>
+    """
+    
+    # Render the board with enhanced styling
+    for i in range(len(board)):
+        html += "<div class='board-row'>"
+        for j in range(len(board)):
+            val = int(board[i, j])
+            tile_class = tile_style(val)
+            txt = str(val) if val != 0 else ""
+            html += f"<div class='{tile_class}'>{txt}</div>"
+        html += "</div>"
+    
+    html += """
+        </div>
+    </div>
+    """
+    
+    return html
@@ -0,0 +1,209 @@
+"""Compact binary replay log for finished or running games.
+
+A replay stores the starting board and, for every move, the direction and
+the tile that spawned afterwards.  One record packs ``direction`` (2 bits),
+whether the spawn was a 4 (1 bit) and the spawn cell, so boards of up to
+32 cells (4x4 and 5x5) take one byte per move; larger boards take two.
+Replays do not depend on any RNG, so they stay valid if spawning changes.
+
+File layout (little-endian)::
+
+    header       magic, format version, size, checkpoint interval,
+                 move count, seed
+    start board  size * size rank bytes (log2 of each tile, 0 = empty)
+    moves        move count records of 1 or 2 bytes
+    checkpoints  one (score, ranks) snapshot after every ``interval`` moves
+
+The checkpoints let ``Replay.state`` seek into long games by replaying at
+most ``interval - 1`` moves from the nearest snapshot.
+
+Run ``python -m game2048.replay FILE --index N`` to print a position.
+"""
+
+import argparse
+import struct
+
+import numpy as np
+
+from . import DIRECTION_NAMES, bitboard, batch
+
+MAGIC = b"G2048R"
+FORMAT_VERSION = 1
+DEFAULT_INTERVAL = 256
+_HEADER = struct.Struct("<6sBBHIQ")  # magic, format version, size, interval, move count, seed
+_SCORE = struct.Struct("<Q")
+
+
+def _record_size(size):
+    return 1 if size * size <= 32 else 2
+
+
+def _ranks(board, size):
+    """Rank bytes of an ndarray board or a packed 4x4 bitboard."""
+    if isinstance(board, int):
+        return bytes((board >> (4 * i)) & 0xF for i in range(size * size))
+    flat = np.asarray(board).reshape(-1)
+    return bytes(int(v).bit_length() - 1 if v else 0 for v in flat)
+
+
+def _board(ranks, size):
+    """ndarray board from rank bytes."""
+    ranks = np.frombuffer(ranks, dtype=np.uint8).astype(int)
+    return np.where(ranks > 0, 1 << ranks, 0).reshape(size, size)
+
+
+class ReplayWriter:
+    """Append-only recorder for one game.
+
+    Call ``record`` after every move with the spawned tile and the board and
+    score after the spawn.  The board may be an ndarray or a packed bitboard;
+    it is only read when a checkpoint is due.
+    """
+
+    def __init__(self, board, seed=0, interval=DEFAULT_INTERVAL):
+        self.size = 4 if isinstance(board, int) else len(board)
+        self.seed = seed
+        self.interval = interval
+        self.start = _ranks(board, self.size)
+        self.moves = bytearray()
+        self.checkpoints = bytearray()
+        self.count = 0
+        self._record = _record_size(self.size)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Resume recording a game saved with ``to_bytes``."""
+        replay = Replay(data)
+        writer = cls.__new__(cls)
+        writer.size, writer.seed, writer.interval = replay.size, replay.seed, replay.interval
+        writer.start = replay.start
+        writer.moves = bytearray(replay.moves)
+        writer.checkpoints = bytearray(replay.checkpoints)
+        writer.count = replay.count
+        writer._record = replay._record
+        return writer
+
+    def __len__(self):
+        return self.count
+
+    def record(self, direction, cell, value, board, score):
+        code = int(direction | (value == 4) << 2 | cell << 3)
+        self.moves += code.to_bytes(self._record, "little")
+        self.count += 1
+        if self.count % self.interval == 0:
+            self.checkpoints += _SCORE.pack(score) + _ranks(board, self.size)
+
+    def truncate(self, count):
+        """Drop every move after the first ``count`` (used by undo)."""
+        if count >= self.count:
+            return
+        self.count = count
+        del self.moves[count * self._record:]
+        del self.checkpoints[(count // self.interval) * (_SCORE.size + self.size * self.size):]
+
+    def to_bytes(self):
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, self.size, self.interval, self.count, self.seed)
+        return header + self.start + self.moves + self.checkpoints
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+class Replay:
+    """Read-only view of a replay with random access to every position."""
+
+    def __init__(self, data):
+        data = memoryview(data)
+        magic, fmt, self.size, self.interval, self.count, self.seed = _HEADER.unpack_from(data)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError("not a 2048 replay")
+        cells = self.size * self.size
+        self._record = _record_size(self.size)
+        moves_at = _HEADER.size + cells
+        checkpoints_at = moves_at + self.count * self._record
+        expected = checkpoints_at + (self.count // self.interval) * (_SCORE.size + cells)
+        if len(data) != expected:
+            raise ValueError(f"replay is {len(data)} bytes, expected {expected}")
+        self.start = bytes(data[_HEADER.size:moves_at])
+        self.moves = bytes(data[moves_at:checkpoints_at])
+        self.checkpoints = bytes(data[checkpoints_at:])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.count
+
+    def move(self, index):
+        """Return ``(direction, cell, value)`` of move ``index``."""
+        if not 0 <= index < self.count:
+            raise IndexError("move index out of range")
+        start = index * self._record
+        code = int.from_bytes(self.moves[start:start + self._record], "little")
+        return code & 3, code >> 3, 4 if code & 4 else 2
+
+    def _checkpoint(self, k):
+        """Score and rank bytes stored after move ``k * interval``."""
+        if k == 0:
+            return 0, self.start
+        step = _SCORE.size + self.size * self.size
+        offset = (k - 1) * step
+        (score,) = _SCORE.unpack_from(self.checkpoints, offset)
+        return score, self.checkpoints[offset + _SCORE.size:offset + step]
+
+    def state(self, index):
+        """Return ``(board, score)`` after the first ``index`` moves.
+
+        Starts from the nearest checkpoint at or before ``index``, so any
+        position costs at most ``interval - 1`` moves to reach.
+        """
+        if not 0 <= index <= self.count:
+            raise IndexError("state index out of range")
+        k = index // self.interval
+        score, ranks = self._checkpoint(k)
+        first = k * self.interval
+        if self.size == 4:
+            board = int.from_bytes(bytes(ranks[i] | ranks[i + 1] << 4 for i in range(0, 16, 2)), "little")
+            for i in range(first, index):
+                direction, cell, value = self.move(i)
+                board, moved, gain = bitboard.move(board, direction)
+                if not moved or (board >> (4 * cell)) & 0xF:
+                    raise ValueError(f"move {i} does not apply to its board")
+                board |= (2 if value == 4 else 1) << (4 * cell)
+                score += gain
+            return bitboard.unpack(board), score
+        board = _board(ranks, self.size)
+        for i in range(first, index):
+            direction, cell, value = self.move(i)
+            boards, moved, gain = batch.move(board[None], direction)
+            board = boards[0]
+            if not moved[0] or board.flat[cell]:
+                raise ValueError(f"move {i} does not apply to its board")
+            board.flat[cell] = value
+            score += int(gain[0])
+        return board, score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a position from a 2048 replay file.")
+    parser.add_argument("path")
+    parser.add_argument("--index", type=int, default=None, help="number of moves to replay (default: all)")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    index = len(replay) if args.index is None else args.index
+    board, score = replay.state(index)
+    print(f"{replay.size}x{replay.size} game, seed {replay.seed}, {len(replay)} moves")
+    if index:
+        direction, cell, value = replay.move(index - 1)
+        print(f"move {index}: {DIRECTION_NAMES[direction]}, spawned {value} at cell {cell}")
+    print(f"score {score}")
+    for row in board:
+        print(" ".join(f"{int(v):5d}" if v else "    ." for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Small seeded random generator for per-game tile spawns.
+
+``GameRng`` is a splitmix64 generator: its whole state is one 64-bit
+counter, so it is cheap to copy, store alongside a saved game and restore.
+It has the subset of the ``random.Random`` interface the engines use
+(``random``, ``randrange`` and ``choice``), so it can be passed anywhere an
+``rng`` is accepted.  Each game owns its generator, so games sharing a
+process never share random state.
+"""
+
+import os
+
+_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def new_seed():
+    """Return a fresh 64-bit seed from the OS entropy pool."""
+    return int.from_bytes(os.urandom(8), "little")
+
+
+class GameRng:
+    def __init__(self, seed=None):
+        self.seed = new_seed() if seed is None else seed & _MASK
+        self.state = self.seed
+
+    def next_u64(self):
+        self.state = (self.state + 0x9E3779B97F4A7C15) & _MASK
+        z = self.state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+        return z ^ (z >> 31)
+
+    def random(self):
+        """Float in ``[0, 1)`` with 53 random bits."""
+        return (self.next_u64() >> 11) * (1.0 / (1 << 53))
+
+    def randrange(self, n):
+        """Integer in ``[0, n)``; the multiply-shift bias is below 2**-58 for board-sized ``n``."""
+        return (self.next_u64() * n) >> 64
+
+    def choice(self, seq):
+        return seq[self.randrange(len(seq))]
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state & _MASK
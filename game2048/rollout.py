@@ -0,0 +1,92 @@
+"""Monte Carlo rollout hints on the batch engine.
+
+For every legal first move, ``rollouts`` copies of the resulting board are
+played on with uniformly random legal moves for up to ``depth`` moves; the
+direction with the best mean score gain wins.  All rollouts of all
+candidate directions advance together as one ``(N, size, size)`` stack, so
+each step costs a handful of NumPy calls however many rollouts there are.
+
+``submit`` runs a hint on a shared thread pool and returns a future, so a
+front-end can keep responding while the rollouts run; NumPy releases the
+GIL inside its array loops.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import DIRECTIONS, batch
+
+DEFAULT_ROLLOUTS = 100
+DEFAULT_DEPTH = 50
+DEFAULT_TIME_BUDGET = 0.1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _random_directions(masks, rng):
+    """Pick one legal direction per board uniformly from its legal-move mask."""
+    keys = rng.random((len(masks), len(DIRECTIONS)))
+    legal = (masks[:, None] >> np.arange(len(DIRECTIONS), dtype=np.uint8)) & 1
+    keys[legal == 0] = -1.0
+    return np.argmax(keys, axis=1)
+
+
+def rollout_values(board, rollouts=DEFAULT_ROLLOUTS, depth=DEFAULT_DEPTH,
+                   time_budget=DEFAULT_TIME_BUDGET, rng=None):
+    """Return ``{direction: mean score gained}`` for every legal first move.
+
+    Rollouts stop after ``depth`` moves, when every board is stuck, or when
+    ``time_budget`` seconds have passed (None disables the clock), so the
+    values are always available on time.
+    """
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    rng = rng if rng is not None else np.random.default_rng()
+    board = np.asarray(board)
+    first_mask = int(batch.legal_mask(board[None])[0])
+    first = [d for d in DIRECTIONS if first_mask >> d & 1]
+    if not first:
+        return {}
+
+    boards = np.repeat(board[None], len(first) * rollouts, axis=0)
+    boards, _, score = batch.move(boards, np.repeat(first, rollouts))
+    batch.add_random_tile(boards, rng)
+    for _ in range(depth):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        masks = batch.legal_mask(boards)
+        live = np.flatnonzero(masks)
+        if not len(live):
+            break
+        # Only boards that can still move take part in the step.
+        moved_boards, _, gain = batch.move(boards[live], _random_directions(masks[live], rng))
+        batch.add_random_tile(moved_boards, rng)
+        boards[live] = moved_boards
+        score[live] += gain
+    values = score.reshape(len(first), rollouts).mean(axis=1)
+    return {d: float(v) for d, v in zip(first, values)}
+
+
+def best_move(board, **options):
+    """Direction with the best mean rollout score, or None if no move is legal."""
+    values = rollout_values(board, **options)
+    if not values:
+        return None
+    return max(values, key=values.get)
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="rollout")
+        return _executor
+
+
+def submit(board, **options):
+    """Run ``best_move`` on the shared thread pool; returns a ``Future``."""
+    return _pool().submit(best_move, np.array(board), **options)
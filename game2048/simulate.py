@@ -0,0 +1,129 @@
+"""Headless self-play: play many games with a policy across a process pool.
+
+Run ``python -m game2048.simulate --games 1000 --policy greedy`` to stream
+one JSON line per finished game (seed, final score, max tile, move count
+and wall time).  Every game gets its own seed derived from ``--seed`` and
+the game index, so results are reproducible however games are spread over
+the workers.  ``--replay-dir`` also saves every game as a compact replay
+(see ``replay``) named after its game index.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import bitboard
+from .policies import POLICIES, make_policy
+from .replay import ReplayWriter
+from .rng import GameRng
+
+_worker_policy = None
+
+
+def game_seed(base_seed, index):
+    """Derive a well-mixed per-game seed from the run seed and game index."""
+    return int(np.random.SeedSequence(base_seed, spawn_key=(index,)).generate_state(1, np.uint64)[0])
+
+
+def play_game(policy, seed, max_moves=None, replay_path=None):
+    """Play one game to completion and return its summary.
+
+    With ``replay_path`` the game is also saved as a replay file.
+    """
+    rng = GameRng(seed)
+    start = time.perf_counter()
+    board = bitboard.new_board(rng)
+    replay = ReplayWriter(board, seed=seed) if replay_path else None
+    score = 0
+    moves = 0
+    while max_moves is None or moves < max_moves:
+        direction = policy(board, rng)
+        if direction is None:
+            break
+        board, moved, gain = bitboard.move(board, direction)
+        if not moved:
+            break
+        score += gain
+        moves += 1
+        spawned = bitboard.add_random_tile(board, rng)
+        if replay is not None:
+            cell = ((spawned ^ board).bit_length() - 1) // 4
+            replay.record(direction, cell, 1 << ((spawned >> (4 * cell)) & 0xF), spawned, score)
+        board = spawned
+    if replay is not None:
+        replay.save(replay_path)
+    return {
+        "seed": seed,
+        "score": score,
+        "max_tile": bitboard.max_tile(board),
+        "moves": moves,
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def _init_worker(policy_name, policy_options):
+    global _worker_policy
+    _worker_policy = make_policy(policy_name, **policy_options)
+
+
+def _play_indexed(task):
+    index, seed, max_moves, replay_dir = task
+    replay_path = os.path.join(replay_dir, f"game-{index}.replay") if replay_dir else None
+    result = play_game(_worker_policy, seed, max_moves, replay_path)
+    result["game"] = index
+    return result
+
+
+def run(games, policy_name, policy_options=None, seed=0, workers=None, max_moves=None, replay_dir=None):
+    """Yield one result dict per game as games finish."""
+    policy_options = policy_options or {}
+    if replay_dir:
+        os.makedirs(replay_dir, exist_ok=True)
+    tasks = ((i, game_seed(seed, i), max_moves, replay_dir) for i in range(games))
+    if workers == 1:
+        _init_worker(policy_name, policy_options)
+        yield from map(_play_indexed, tasks)
+        return
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(64, games // (workers * 8)))
+    with multiprocessing.Pool(workers, _init_worker, (policy_name, policy_options)) as pool:
+        yield from pool.imap_unordered(_play_indexed, tasks, chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play 2048 games headlessly and stream results as JSONL.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the whole run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--max-moves", type=int, default=None, help="stop each game after this many moves")
+    parser.add_argument("--time-budget", type=float, default=0.05, help="expectimax seconds per move")
+    parser.add_argument("--depth", type=int, default=None, help="fixed expectimax depth (reproducible)")
+    parser.add_argument("--weights", default=None, help="n-tuple weights file for --policy ntuple")
+    parser.add_argument("--replay-dir", default=None, help="save every game as a replay file here")
+    parser.add_argument("--output", "-o", default="-", help="JSONL output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.policy == "expectimax":
+        options = {"time_budget": args.time_budget, "depth": args.depth}
+    elif args.policy == "ntuple":
+        options = {"weights": args.weights}
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in run(args.games, args.policy, options, args.seed, args.workers, args.max_moves, args.replay_dir):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
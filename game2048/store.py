@@ -0,0 +1,202 @@
+"""Server-side game store with bounded memory.
+
+A browser session keeps only a game id; the game itself lives in a store
+shared by the whole process.  ``MemoryStore`` holds live ``GameState``
+objects in LRU order and moves games out when there are more than
+``max_games`` of them or one has been idle for ``ttl`` seconds.  Evicted
+games are encoded into a compact blob (packed board, score, RNG state and
+the replay log) and handed to an optional spill store such as
+``SQLiteStore``, which keeps them on disk until they are resumed or expire.
+
+Undo history is not part of the blob, so a game restored from disk starts
+with an empty history.
+"""
+
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from .history import History, pack_board, unpack_board
+from .replay import ReplayWriter
+from .rng import GameRng
+
+DEFAULT_MAX_GAMES = 1000
+DEFAULT_IDLE_TTL = 15 * 60
+DEFAULT_SPILL_TTL = 7 * 24 * 3600
+# The spill store deletes expired games every this many writes.
+_PURGE_INTERVAL = 256
+
+_FORMAT_VERSION = 1
+_RECORD = struct.Struct("<BBBQQ")  # format version, size, flags, score, rng state
+_WON = 1
+_GAME_OVER = 2
+_BYTE_RANKS = 4
+
+
+class GameState:
+    """Everything needed to continue one game."""
+
+    def __init__(self, board, score, rng, replay, history=None, won=False, game_over=False):
+        self.size = len(board)
+        self.board = board
+        self.score = score
+        self.rng = rng
+        self.replay = replay
+        self.history = history if history is not None else History()
+        self.won = won
+        self.game_over = game_over
+        self.score_gain = 0
+        self.last_move_time = 0
+
+
+def encode(game):
+    """Serialize a game into a compact blob."""
+    key = pack_board(game.board)
+    flags = (_WON if game.won else 0) | (_GAME_OVER if game.game_over else 0)
+    if isinstance(key, bytes):
+        flags |= _BYTE_RANKS
+        board = key
+    else:
+        board = key.to_bytes((game.size * game.size + 1) // 2, "little")
+    header = _RECORD.pack(_FORMAT_VERSION, game.size, flags, game.score, game.rng.getstate())
+    return header + board + game.replay.to_bytes()
+
+
+def decode(blob):
+    """Inverse of ``encode``; the game comes back with an empty undo history."""
+    version, size, flags, score, rng_state = _RECORD.unpack_from(blob)
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"unsupported game record version {version}")
+    cells = size * size
+    start = _RECORD.size
+    if flags & _BYTE_RANKS:
+        key, start = bytes(blob[start:start + cells]), start + cells
+    else:
+        length = (cells + 1) // 2
+        key, start = int.from_bytes(blob[start:start + length], "little"), start + length
+    replay = ReplayWriter.from_bytes(blob[start:])
+    rng = GameRng(replay.seed)
+    rng.setstate(rng_state)
+    return GameState(unpack_board(key, size), score, rng, replay,
+                     won=bool(flags & _WON), game_over=bool(flags & _GAME_OVER))
+
+
+class MemoryStore:
+    """Game id -> GameState, bounded by count and idle time.
+
+    ``get`` returns the live object, so changes made to it need no ``put``.
+    Games pushed out of memory go to ``spill`` (if any) and are loaded back
+    transparently by ``get``.
+    """
+
+    def __init__(self, max_games=DEFAULT_MAX_GAMES, ttl=DEFAULT_IDLE_TTL, spill=None, clock=time.monotonic):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.spill = spill
+        self._clock = clock
+        self._games = OrderedDict()  # id -> (game, last access)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._games)
+
+    def get(self, game_id):
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            entry = self._games.get(game_id)
+            if entry is not None:
+                self._games[game_id] = (entry[0], now)
+                self._games.move_to_end(game_id)
+                return entry[0]
+        if self.spill is None:
+            return None
+        game = self.spill.get(game_id)
+        if game is not None:
+            self.put(game_id, game)
+        return game
+
+    def put(self, game_id, game):
+        with self._lock:
+            now = self._clock()
+            self._games[game_id] = (game, now)
+            self._games.move_to_end(game_id)
+            self._expire(now)
+            while len(self._games) > self.max_games:
+                self._evict()
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+        if self.spill is not None:
+            self.spill.delete(game_id)
+
+    def _expire(self, now):
+        # Entries are in access order, so idle ones are all at the front.
+        while self._games and now - next(iter(self._games.values()))[1] > self.ttl:
+            self._evict()
+
+    def _evict(self):
+        game_id, (game, _) = self._games.popitem(last=False)
+        if self.spill is not None:
+            self.spill.put(game_id, game)
+
+    def flush(self):
+        """Move every game to the spill store, e.g. on shutdown."""
+        with self._lock:
+            while self._games:
+                self._evict()
+
+
+class SQLiteStore:
+    """Encoded games in a local SQLite file, dropped after ``ttl`` seconds unused."""
+
+    def __init__(self, path, ttl=DEFAULT_SPILL_TTL, clock=time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS games (id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self.purge()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def get(self, game_id):
+        with self._lock:
+            row = self._db.execute("SELECT data, updated FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None or self._clock() - row[1] > self.ttl:
+            return None
+        return decode(row[0])
+
+    def put(self, game_id, game):
+        blob = encode(game)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO games (id, data, updated) VALUES (?, ?, ?)",
+                (game_id, blob, self._clock()),
+            )
+            self._writes += 1
+            purge = self._writes % _PURGE_INTERVAL == 0
+        if purge:
+            self.purge()
+
+    def delete(self, game_id):
+        with self._lock:
+            self._db.execute("DELETE FROM games WHERE id = ?", (game_id,))
+
+    def purge(self):
+        """Delete every game that has not been written for ``ttl`` seconds."""
+        with self._lock:
+            self._db.execute("DELETE FROM games WHERE updated < ?", (self._clock() - self.ttl,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,135 @@
+"""The eight symmetries of a square board.
+
+Rotating or reflecting a board changes which direction does what, but not
+how good the position is, so a cache keyed by board can store one entry per
+symmetry class instead of up to eight.  ``canonical`` maps a packed 4x4
+bitboard to the smallest of its eight images, and ``canonical_array`` does
+the same for an ndarray board of any size.  Both also return the transform
+used, a number from 0 to 7 made of three bits applied in this order:
+
+    FLIP_H     mirror left-right (LEFT <-> RIGHT)
+    FLIP_V     mirror top-bottom (UP <-> DOWN)
+    TRANSPOSE  swap rows and columns (UP <-> LEFT, DOWN <-> RIGHT)
+
+``to_canonical`` and ``from_canonical`` translate directions between a
+board and its canonical form; ``mask_to_canonical`` and
+``mask_from_canonical`` do the same for legal-move masks.
+"""
+
+from . import DIRECTIONS, DOWN, LEFT, RIGHT, UP
+
+FLIP_H, FLIP_V, TRANSPOSE = 1, 2, 4
+
+_SWAP_H = {UP: UP, DOWN: DOWN, LEFT: RIGHT, RIGHT: LEFT}
+_SWAP_V = {UP: DOWN, DOWN: UP, LEFT: LEFT, RIGHT: RIGHT}
+_SWAP_T = {UP: LEFT, DOWN: RIGHT, LEFT: UP, RIGHT: DOWN}
+
+
+def _direction_table(transform, inverse):
+    steps = [(FLIP_H, _SWAP_H), (FLIP_V, _SWAP_V), (TRANSPOSE, _SWAP_T)]
+    if inverse:
+        steps.reverse()
+    table = []
+    for d in DIRECTIONS:
+        for bit, swap in steps:
+            if transform & bit:
+                d = swap[d]
+        table.append(d)
+    return tuple(table)
+
+
+# _FORWARD[t][d]: the direction on the transformed board that does what d did.
+_FORWARD = tuple(_direction_table(t, False) for t in range(8))
+_BACKWARD = tuple(_direction_table(t, True) for t in range(8))
+_MASK_FORWARD = tuple(
+    tuple(sum(1 << table[d] for d in DIRECTIONS if mask >> d & 1) for mask in range(16))
+    for table in _FORWARD
+)
+_MASK_BACKWARD = tuple(
+    tuple(sum(1 << table[d] for d in DIRECTIONS if mask >> d & 1) for mask in range(16))
+    for table in _BACKWARD
+)
+
+
+def to_canonical(direction, transform):
+    """Direction on the canonical board equivalent to ``direction`` on the original."""
+    return _FORWARD[transform][direction]
+
+
+def from_canonical(direction, transform):
+    """Direction on the original board equivalent to ``direction`` on the canonical one."""
+    return _BACKWARD[transform][direction]
+
+
+def mask_to_canonical(mask, transform):
+    return _MASK_FORWARD[transform][mask]
+
+
+def mask_from_canonical(mask, transform):
+    return _MASK_BACKWARD[transform][mask]
+
+
+# --- Packed 4x4 bitboards ---
+
+def flip_h(board):
+    """Reverse the four cells of every row."""
+    board = ((board & 0x0F0F0F0F0F0F0F0F) << 4) | ((board >> 4) & 0x0F0F0F0F0F0F0F0F)
+    return ((board & 0x00FF00FF00FF00FF) << 8) | ((board >> 8) & 0x00FF00FF00FF00FF)
+
+
+def flip_v(board):
+    """Reverse the order of the rows."""
+    return ((board & 0xFFFF) << 48 | (board >> 16 & 0xFFFF) << 32
+            | (board >> 32 & 0xFFFF) << 16 | board >> 48)
+
+
+def transpose(board):
+    """Swap rows and columns."""
+    a = (board & 0xF0F00F0FF0F00F0F) | (board & 0x0000F0F00000F0F0) << 12 | (board >> 12) & 0x0000F0F00000F0F0
+    return (a & 0xFF00FF0000FF00FF) | (a & 0x00FF00FF00000000) >> 24 | (a << 24) & 0x00FF00FF00000000
+
+
+def canonical(board):
+    """``(smallest symmetric image, transform)`` of a packed 4x4 board."""
+    h = flip_h(board)
+    v = flip_v(board)
+    hv = flip_v(h)
+    best, transform = board, 0
+    for image, t in ((h, FLIP_H), (v, FLIP_V), (hv, FLIP_H | FLIP_V),
+                     (transpose(board), TRANSPOSE), (transpose(h), TRANSPOSE | FLIP_H),
+                     (transpose(v), TRANSPOSE | FLIP_V), (transpose(hv), TRANSPOSE | FLIP_H | FLIP_V)):
+        if image < best:
+            best, transform = image, t
+    return best, transform
+
+
+def canonical_key(board):
+    """Smallest symmetric image of a packed 4x4 board, for keying caches."""
+    h = flip_h(board)
+    v = flip_v(board)
+    hv = flip_v(h)
+    return min(board, h, v, hv, transpose(board), transpose(h), transpose(v), transpose(hv))
+
+
+# --- ndarray boards ---
+
+def apply(board, transform):
+    """Image of an ndarray board under ``transform``."""
+    if transform & FLIP_H:
+        board = board[:, ::-1]
+    if transform & FLIP_V:
+        board = board[::-1]
+    if transform & TRANSPOSE:
+        board = board.T
+    return board
+
+
+def canonical_array(board):
+    """``(canonical board bytes, transform)`` for an ndarray board of any size.
+
+    The canonical form is the image with the smallest ``tobytes()``; the
+    bytes are returned since they are what caches key on.
+    """
+    keys = [apply(board, t).tobytes() for t in range(8)]
+    best = min(keys)
+    return best, keys.index(best)
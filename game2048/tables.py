@@ -0,0 +1,110 @@
+"""Lookup tables cached in versioned binary files and shared through mmap.
+
+Table-driven engines need tables over all 65536 packed rows.  Building them
+in Python takes a noticeable fraction of a second, and every process would
+hold its own copy.  ``load_tables`` builds a named set of tables once,
+writes it to ``<cache dir>/<name>-v<version>.bin`` and maps the file
+read-only, so later processes (including pool workers) start instantly and
+share the pages through the OS page cache.
+
+The cache directory is ``$GAME2048_CACHE_DIR`` if set, else
+``~/.cache/game2048``.  If it cannot be written, tables are built in memory.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+MAGIC = b"G2048TBL"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHI")  # magic, format version, byte order, table count
+_ENTRY = struct.Struct("<4sQQ")  # typecode, offset, length in items
+_ALIGN = 64
+_BYTEORDERS = {"little": 0, "big": 1}
+
+
+def cache_dir():
+    path = os.environ.get("GAME2048_CACHE_DIR")
+    return Path(path) if path else Path.home() / ".cache" / "game2048"
+
+
+def table_path(name, version):
+    return cache_dir() / f"{name}-v{version}.bin"
+
+
+def _write(path, tables):
+    offset = _HEADER.size + _ENTRY.size * len(tables)
+    entries = []
+    for table in tables:
+        offset = -(-offset // _ALIGN) * _ALIGN
+        entries.append((table.typecode, offset, len(table)))
+        offset += len(table) * table.itemsize
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTEORDERS[sys.byteorder], len(tables)))
+            for typecode, start, length in entries:
+                f.write(_ENTRY.pack(typecode.encode(), start, length))
+            for table, (_, start, _) in zip(tables, entries):
+                f.write(b"\0" * (start - f.tell()))
+                table.tofile(f)
+        # Atomic, so concurrent builders never expose a half-written file.
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, fmt, order, count = _HEADER.unpack_from(view)
+    if magic != MAGIC or fmt != FORMAT_VERSION or order != _BYTEORDERS[sys.byteorder]:
+        raise ValueError(f"{path} is not a compatible table file")
+    tables = []
+    for i in range(count):
+        typecode, start, length = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+        typecode = typecode.rstrip(b"\0").decode()
+        itemsize = array(typecode).itemsize
+        if start + length * itemsize > len(view):
+            raise ValueError(f"{path} is truncated")
+        tables.append(view[start:start + length * itemsize].cast(typecode))
+    return tables
+
+
+def save_tables(path, tables):
+    """Write ``array.array`` tables to ``path`` atomically, in the cache file format."""
+    _write(Path(path), tables)
+
+
+def map_tables(path):
+    """Memory-map a file written by ``save_tables``; returns read-only memoryviews."""
+    return _map(Path(path))
+
+
+def load_tables(name, version, build):
+    """Return the tables produced by ``build()``, cached on disk and memory-mapped.
+
+    ``build`` returns a list of ``array.array`` objects.  The result is a list
+    of read-only memoryviews with the same typecodes and lengths (or the
+    arrays themselves when the cache cannot be used).  Bump ``version``
+    whenever the contents ``build`` produces change.
+    """
+    path = table_path(name, version)
+    try:
+        return _map(path)
+    except (OSError, ValueError, struct.error):
+        pass
+    tables = build()
+    try:
+        _write(path, tables)
+        return _map(path)
+    except OSError:
+        return tables
@@ -0,0 +1,133 @@
+"""Terminal front-end for 2048.
+
+    python -m game2048.tui [--size N] [--seed S] [--replay-out PATH]
+
+Keys: arrows, WASD or hjkl move; u undo, y redo, ? hint, r new game, q quit.
+
+The board is drawn once; after each move only the cells whose value
+changed are rewritten, so a key press costs one engine move plus a handful
+of ``addstr`` calls.  The status line shows how long the last move took in
+the engine and on screen, which makes this a convenient way to profile the
+engine without any web UI in the way.  Nothing here imports Streamlit.
+"""
+
+import argparse
+import curses
+import time
+
+from . import DIRECTION_NAMES, DOWN, LEFT, RIGHT, UP
+from .core import new_game, play_move, redo_move, suggest_move, undo_move, update_status
+
+KEYS = {
+    curses.KEY_UP: UP, curses.KEY_DOWN: DOWN, curses.KEY_LEFT: LEFT, curses.KEY_RIGHT: RIGHT,
+    ord("w"): UP, ord("s"): DOWN, ord("a"): LEFT, ord("d"): RIGHT,
+    ord("k"): UP, ord("j"): DOWN, ord("h"): LEFT, ord("l"): RIGHT,
+}
+CELL_WIDTH = 7
+TOP = 2
+LEFT_MARGIN = 2
+
+
+# --- Drawing ---
+
+def _color(value):
+    if not curses.has_colors() or not value:
+        return 0
+    return curses.color_pair(1 + min(value.bit_length() - 2, 6))
+
+
+def _init_colors():
+    if not curses.has_colors():
+        return
+    curses.start_color()
+    curses.use_default_colors()
+    colors = (curses.COLOR_WHITE, curses.COLOR_YELLOW, curses.COLOR_GREEN, curses.COLOR_CYAN,
+              curses.COLOR_BLUE, curses.COLOR_MAGENTA, curses.COLOR_RED)
+    for i, color in enumerate(colors):
+        curses.init_pair(1 + i, color, -1)
+
+
+class Screen:
+    """Draws the grid once and then rewrites only cells that changed."""
+
+    def __init__(self, stdscr, size):
+        self.stdscr = stdscr
+        self.size = size
+        self.shown = [None] * (size * size)
+        stdscr.erase()
+        stdscr.addstr(0, LEFT_MARGIN, "2048 - arrows/WASD/hjkl move, u undo, y redo, ? hint, r new, q quit")
+        rule = "+" + ("-" * (CELL_WIDTH - 1) + "+") * size
+        for r in range(size + 1):
+            stdscr.addstr(TOP + 2 * r, LEFT_MARGIN, rule)
+            if r < size:
+                stdscr.addstr(TOP + 2 * r + 1, LEFT_MARGIN, ("|" + " " * (CELL_WIDTH - 1)) * size + "|")
+
+    def draw(self, board):
+        for i, value in enumerate(board.flat):
+            value = int(value)
+            if value == self.shown[i]:
+                continue
+            self.shown[i] = value
+            r, c = divmod(i, self.size)
+            text = str(value).center(CELL_WIDTH - 1) if value else " " * (CELL_WIDTH - 1)
+            self.stdscr.addstr(TOP + 2 * r + 1, LEFT_MARGIN + 1 + c * CELL_WIDTH, text, _color(value))
+
+    def status(self, text):
+        y = TOP + 2 * self.size + 1
+        self.stdscr.move(y, 0)
+        self.stdscr.clrtoeol()
+        self.stdscr.addstr(y, LEFT_MARGIN, text)
+
+
+def run(stdscr, size=4, seed=None, replay_out=None):
+    curses.curs_set(0)
+    _init_colors()
+    game = new_game(size, seed)
+    screen = Screen(stdscr, size)
+    message = f"seed {game.rng.seed}"
+    engine_us = 0.0
+    while True:
+        start = time.perf_counter()
+        screen.draw(game.board)
+        draw_us = (time.perf_counter() - start) * 1e6
+        update_status(game)
+        screen.status(f"score {game.score}  moves {len(game.replay)}  engine {engine_us:.0f}us"
+                      f"  draw {draw_us:.0f}us  {'GAME OVER  ' if game.game_over else ''}{message}")
+        stdscr.refresh()
+        key = stdscr.getch()
+        message = ""
+        start = time.perf_counter()
+        if key in KEYS:
+            if not play_move(game, KEYS[key])[0]:
+                message = "no move"
+        elif key == ord("u"):
+            message = "" if undo_move(game) else "nothing to undo"
+        elif key == ord("y"):
+            message = "" if redo_move(game) else "nothing to redo"
+        elif key == ord("?"):
+            direction = suggest_move(game.board)
+            message = f"try {DIRECTION_NAMES[direction]}" if direction is not None else "no moves left"
+        elif key == ord("r"):
+            game = new_game(size)
+            screen = Screen(stdscr, size)
+            message = f"seed {game.rng.seed}"
+        elif key == ord("q"):
+            break
+        engine_us = (time.perf_counter() - start) * 1e6
+    if replay_out:
+        game.replay.save(replay_out)
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play 2048 in the terminal.")
+    parser.add_argument("--size", type=int, default=4, help="board size (default: 4)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for tile spawns")
+    parser.add_argument("--replay-out", default=None, help="save the game as a replay file on exit")
+    args = parser.parse_args(argv)
+    game = curses.wrapper(run, args.size, args.seed, args.replay_out)
+    print(f"score {game.score} after {len(game.replay)} moves (seed {game.rng.seed})")
+
+
+if __name__ == "__main__":
+    main()
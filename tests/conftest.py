@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+from game2048 import DIRECTIONS, core
+
+
+def _play(game, moves, seed=0):
+    """Play up to ``moves`` random legal moves. Returns the (board, score) before and after each."""
+    rng = random.Random(seed)
+    states = [(game.board.copy(), game.score)]
+    for _ in range(moves):
+        mask = core.legal_mask(game.board)
+        if not mask:
+            break
+        direction = rng.choice([d for d in DIRECTIONS if mask >> d & 1])
+        assert core.play_move(game, direction)[0]
+        states.append((game.board.copy(), game.score))
+    return states
+
+
+@pytest.fixture
+def play():
+    return _play
@@ -0,0 +1,48 @@
+import numpy as np
+
+from game2048 import DIRECTIONS, LEFT, bitboard, core
+
+
+def test_play_move_uses_bitboard_engine(monkeypatch):
+    # The Streamlit app always asks for merged cells; that must not force the ndarray path.
+    calls = []
+    original = bitboard.move_array
+
+    def move_array(board, direction, merged=None):
+        calls.append(direction)
+        return original(board, direction, merged)
+
+    monkeypatch.setattr(core, "ENGINE", "bitboard")
+    monkeypatch.setattr(core, "bitboard", bitboard, raising=False)
+    monkeypatch.setattr(bitboard, "move_array", move_array)
+    game = core.new_game(seed=1)
+    game.board[...] = 0
+    game.board[0] = [2, 2, 4, 4]
+    merged = []
+    assert core.play_move(game, LEFT, merged)[0]
+    assert calls == [LEFT]
+    assert sorted(merged) == [0, 1]
+    assert (game.board[0, :2] == [4, 8]).all()
+
+
+def test_play_move_keeps_other_sizes_on_ndarray_engine(monkeypatch):
+    monkeypatch.setattr(core, "ENGINE", "bitboard")
+    monkeypatch.setattr(core, "bitboard", bitboard, raising=False)
+    monkeypatch.setattr(bitboard, "move_array", None)
+    game = core.new_game(size=5, seed=1)
+    game.board[...] = 0
+    game.board[0, :2] = 2
+    merged = []
+    assert core.play_move(game, LEFT, merged)[0]
+    assert merged == [0] and game.board[0, 0] == 4
+    assert np.count_nonzero(game.board) == 2
+
+
+def test_legal_mask_matches_moves_under_symmetry():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        ranks = rng.integers(0, 4, size=(4, 4))
+        base = np.where(ranks > 0, 1 << ranks, 0)
+        for board in (base, base.T.copy(), base[::-1].copy(), base[:, ::-1].copy()):
+            expected = sum(1 << d for d in DIRECTIONS if core.move_inplace(board.copy(), d)[0])
+            assert core.legal_mask(board) == expected
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from game2048 import DIRECTIONS, DOWN, LEFT, RIGHT, UP, batch, bitboard, core
+
+MOVES = {LEFT: core.move_left, RIGHT: core.move_right, UP: core.move_up, DOWN: core.move_down}
+
+
+def random_boards(size, count=200, seed=0, max_rank=11):
+    """Boards with a mix of empty cells, equal neighbours and large tiles."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.integers(0, max_rank + 1, size=(count, size, size))
+    ranks[rng.random(ranks.shape) < 0.3] = 0
+    return np.where(ranks > 0, 1 << ranks, 0)
+
+
+def test_bitboard_pack_round_trip():
+    for board in random_boards(4, max_rank=15):
+        assert (bitboard.unpack(bitboard.pack(board)) == board).all()
+
+
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_bitboard_matches_ndarray(direction):
+    for board in random_boards(4):
+        expected, moved, gain = MOVES[direction](board)
+        packed, b_moved, b_gain = bitboard.move(bitboard.pack(board), direction)
+        assert (bitboard.unpack(packed) == expected).all()
+        assert b_moved == moved and b_gain == gain
+
+
+def test_bitboard_merged_cells_match_move_inplace():
+    for board in random_boards(4):
+        for direction in DIRECTIONS:
+            merged = []
+            core.move_inplace(board.copy(), direction, merged)
+            b_merged = []
+            bitboard.move_array(board, direction, b_merged)
+            assert sorted(b_merged) == sorted(merged)
+
+
+def test_bitboard_largest_tile():
+    board = np.zeros((4, 4), dtype=int)
+    board[0, :2] = 1 << bitboard.MAX_RANK
+    packed, moved, gain = bitboard.move_left(bitboard.pack(board))
+    assert packed == bitboard.pack(board) and not moved and gain == 0
+    board[0, 0] = 1 << (bitboard.MAX_RANK + 1)
+    with pytest.raises(ValueError):
+        bitboard.pack(board)
+
+
+# --- In-place moves ---
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_move_inplace_matches_ndarray(size):
+    for board in random_boards(size):
+        for direction in DIRECTIONS:
+            expected, moved, gain = MOVES[direction](board)
+            result = board.copy()
+            merged = []
+            assert core.move_inplace(result, direction, merged) == (moved, gain)
+            assert (result == expected).all()
+            # Every merged cell holds a doubled tile.
+            assert all(result.flat[i] > 2 for i in merged)
+            assert sum(int(result.flat[i]) for i in merged) == gain
+
+
+def test_move_inplace_rejects_views():
+    board = random_boards(4, count=1)[0]
+    with pytest.raises(ValueError):
+        core.move_inplace(board.T, LEFT)
+
+
+# --- Batch engine ---
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_batch_matches_ndarray(size):
+    boards = random_boards(size)
+    for direction in DIRECTIONS:
+        result, moved, gain = batch.move(boards, np.full(len(boards), direction))
+        for board, r, m, g in zip(boards, result, moved, gain):
+            expected, e_moved, e_gain = MOVES[direction](board)
+            assert (r == expected).all() and m == e_moved and g == e_gain
+
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_batch_legal_mask(size):
+    boards = random_boards(size)
+    masks = batch.legal_mask(boards)
+    for board, mask in zip(boards, masks):
+        assert mask == sum(1 << d for d in DIRECTIONS if MOVES[d](board)[1])
+
+
+def test_batch_spawn_on_non_contiguous_boards():
+    boards = np.zeros((8, 4, 4), dtype=int)
+    view = boards.transpose(0, 2, 1)
+    spawned = batch.add_random_tile(view, np.random.default_rng(0))
+    assert spawned.all()
+    assert ((boards != 0).sum(axis=(1, 2)) == 1).all()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from game2048 import core
+from game2048.history import History, pack_board, unpack_board
+from game2048.replay import Replay
+
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_pack_board_round_trip(size):
+    rng = np.random.default_rng(size)
+    ranks = rng.integers(0, 16, size=(size, size))
+    board = np.where(ranks > 0, 1 << ranks, 0)
+    assert (unpack_board(pack_board(board), size) == board).all()
+    board[0, 0] = 1 << 17  # above a nibble: stored one byte per rank
+    key = pack_board(board)
+    assert isinstance(key, bytes) and (unpack_board(key, size) == board).all()
+
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_undo_redo_round_trip(size, play):
+    game = core.new_game(size, seed=5)
+    states = play(game, 30)
+    moves = len(states) - 1
+    for board, score in reversed(states[:-1]):
+        assert core.undo_move(game)
+        assert (game.board == board).all() and game.score == score
+    assert not core.undo_move(game)
+    assert len(game.replay) == 0
+    for board, score in states[1:]:
+        assert core.redo_move(game)
+        assert (game.board == board).all() and game.score == score
+    assert not core.redo_move(game)
+    assert len(game.replay) == moves
+
+
+def test_undo_restores_spawns(play):
+    # After an undo, playing the same move again spawns the same tile.
+    game = core.new_game(seed=9)
+    states = play(game, 5)
+    direction, _, _ = Replay(game.replay.to_bytes()).move(len(game.replay) - 1)
+    core.undo_move(game)
+    core.play_move(game, direction)
+    assert (game.board == states[-1][0]).all()
+
+
+def test_new_move_clears_redo(play):
+    game = core.new_game(seed=2)
+    play(game, 5)
+    core.undo_move(game)
+    assert game.history.can_redo
+    play(game, 1, seed=7)
+    assert not game.history.can_redo
+
+
+def test_history_is_bounded():
+    history = History(max_depth=3)
+    for i in range(10):
+        history.push(i, i, None, (0, 0, 2))
+    assert len(history) == 3
+    assert history.undo(99, 0, None)[0] == 9
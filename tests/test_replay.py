@@ -0,0 +1,44 @@
+import pytest
+
+from game2048 import core
+from game2048.replay import Replay, ReplayWriter
+
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_replay_round_trip(size, play):
+    game = core.new_game(size, seed=size)
+    game.replay = ReplayWriter(game.board, seed=game.rng.seed, interval=8)
+    states = play(game, 100)
+    replay = Replay(game.replay.to_bytes())
+    assert len(replay) == len(states) - 1 and replay.seed == game.rng.seed
+    for index, (board, score) in enumerate(states):
+        r_board, r_score = replay.state(index)
+        assert (r_board == board).all() and r_score == score
+
+
+def test_replay_writer_resumes_from_bytes(play):
+    game = core.new_game(seed=3)
+    play(game, 40)
+    data = game.replay.to_bytes()
+    writer = ReplayWriter.from_bytes(data)
+    assert writer.to_bytes() == data
+    writer.truncate(10)
+    assert Replay(writer.to_bytes()).state(10)[1] == Replay(data).state(10)[1]
+
+
+def test_replay_rejects_garbage():
+    with pytest.raises(ValueError):
+        Replay(b"not a replay at all, just some bytes")
+
+
+@pytest.mark.parametrize("size", core.BOARD_SIZES)
+def test_seeded_games_are_deterministic(size, play):
+    a = core.new_game(size, seed=42)
+    b = core.new_game(size, seed=42)
+    states_a = play(a, 60, seed=1)
+    states_b = play(b, 60, seed=1)
+    assert len(states_a) == len(states_b)
+    for (board_a, score_a), (board_b, score_b) in zip(states_a, states_b):
+        assert (board_a == board_b).all() and score_a == score_b
+    assert a.replay.to_bytes() == b.replay.to_bytes()
+    assert a.rng.getstate() == b.rng.getstate()
@@ -0,0 +1,30 @@
+import pickle
+
+import numpy as np
+
+from game2048 import expectimax
+from game2048.heuristic import get_heuristic
+
+BOARD = np.array([[2, 4, 8, 16], [4, 8, 16, 32], [0, 2, 0, 4], [0, 0, 2, 0]])
+
+
+def test_heuristic_pickles_as_weights():
+    heuristic = get_heuristic(empty=300.0)
+    assert pickle.loads(pickle.dumps(heuristic)) is heuristic
+    evaluate = pickle.loads(pickle.dumps(heuristic.evaluate))
+    assert evaluate(expectimax.pack(BOARD)) == heuristic.evaluate(expectimax.pack(BOARD))
+
+
+def test_parallel_search_matches_serial_with_custom_evaluate():
+    evaluate = get_heuristic(empty=300.0, merges=500.0).evaluate
+    serial = expectimax.searcher(workers=1, evaluate=evaluate)
+    parallel = expectimax.searcher(workers=2, time_budget=None, evaluate=evaluate, table=expectimax.TranspositionTable())
+    assert isinstance(parallel, expectimax.ParallelSearch)
+    for depth in (1, 2):
+        assert parallel.best_move(BOARD, depth=depth) == serial.best_move(BOARD, depth=depth)
+
+
+def test_search_deepens_between_min_depth_and_search_depth():
+    search = expectimax.ExpectimaxSearch(time_budget=10.0)
+    search.best_move(BOARD)
+    assert search.depth_reached == expectimax.search_depth(expectimax.pack(BOARD))